@@ -8,6 +8,9 @@ namespace IntelliInspect.API.Controllers;
 [Route("api/[controller]")]
 public class SimulationController : ControllerBase
 {
+    private const string ClientIdHeader = "X-Client-Id";
+    private const int MaxClientIdLength = 64;
+
     private readonly IMLService _mlService;
     private readonly ILogger<SimulationController> _logger;
 
@@ -27,10 +30,11 @@ public class SimulationController : ControllerBase
                 return BadRequest("Invalid request data.");
             }
 
-            _logger.LogInformation("Getting simulation count for period: {Start} to {End}",
-                request.SimulationPeriod.Start, request.SimulationPeriod.End);
+            var clientId = GetClientId();
+            _logger.LogInformation("Getting simulation count for period: {Start} to {End} for client {ClientId}",
+                request.SimulationPeriod.Start, request.SimulationPeriod.End, clientId);
 
-            var count = await _mlService.GetSimulationCountAsync(request);
+            var count = await _mlService.GetSimulationCountAsync(request, clientId);
 
             _logger.LogInformation("Simulation count retrieved: {TotalRecords} records", count.TotalRecords);
 
@@ -53,10 +57,11 @@ public class SimulationController : ControllerBase
                 return BadRequest("Invalid request data.");
             }
 
-            _logger.LogInformation("Getting next prediction for simulation period: {Start} to {End}",
-                request.SimulationPeriod.Start, request.SimulationPeriod.End);
+            var clientId = GetClientId();
+            _logger.LogInformation("Getting next prediction for simulation period: {Start} to {End} for client {ClientId}",
+                request.SimulationPeriod.Start, request.SimulationPeriod.End, clientId);
 
-            var prediction = await _mlService.PredictNextAsync(request);
+            var prediction = await _mlService.PredictNextAsync(request, clientId);
 
             _logger.LogInformation("Prediction completed: {Prediction} with {Confidence}% confidence for sample {SampleId}",
                 prediction.Prediction, prediction.Confidence, prediction.SampleId);
@@ -69,4 +74,16 @@ public class SimulationController : ControllerBase
             return StatusCode(500, "An error occurred while getting prediction.");
         }
     }
+
+    // Each browser tab sends its own X-Client-Id so concurrent simulations get separate sessions;
+    // clients that do not are told apart by address
+    private string GetClientId()
+    {
+        var clientId = Request.Headers[ClientIdHeader].FirstOrDefault();
+        if (string.IsNullOrWhiteSpace(clientId) || clientId.Length > MaxClientIdLength)
+        {
+            return HttpContext.Connection.RemoteIpAddress?.ToString() ?? "default";
+        }
+        return clientId;
+    }
 }
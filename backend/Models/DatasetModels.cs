@@ -69,6 +69,15 @@ public class TrainingRequest
     
     [JsonPropertyName("dataStrategy")]
     public string DataStrategy { get; set; } = "auto";
+    
+    [JsonPropertyName("modelFamily")]
+    public string ModelFamily { get; set; } = "random_forest";
+    
+    [JsonPropertyName("hyperparameterSearch")]
+    public bool HyperparameterSearch { get; set; } = false;
+    
+    [JsonPropertyName("searchTimeBudgetSeconds")]
+    public double SearchTimeBudgetSeconds { get; set; } = 60.0;
 }
 
 public class TrainingMetrics
@@ -96,6 +105,30 @@ public class TrainingMetrics
     
     [JsonPropertyName("confusionMatrix")]
     public ConfusionMatrix ConfusionMatrix { get; set; } = new();
+    
+    [JsonPropertyName("modelFamily")]
+    public string? ModelFamily { get; set; }
+    
+    [JsonPropertyName("hyperparameters")]
+    public Dictionary<string, object>? Hyperparameters { get; set; }
+}
+
+public class TrainingJobStatus
+{
+    [JsonPropertyName("jobId")]
+    public string JobId { get; set; } = string.Empty;
+    
+    [JsonPropertyName("status")]
+    public string Status { get; set; } = string.Empty;
+    
+    [JsonPropertyName("modelId")]
+    public string? ModelId { get; set; }
+    
+    [JsonPropertyName("metrics")]
+    public TrainingMetrics? Metrics { get; set; }
+    
+    [JsonPropertyName("error")]
+    public string? Error { get; set; }
 }
 
 public class ConfusionMatrix
@@ -120,6 +153,14 @@ public class SimulationRequest
     
     [JsonPropertyName("simulationData")]
     public List<Dictionary<string, object>> SimulationData { get; set; } = new();
+    
+    [JsonPropertyName("sessionId")]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public string? SessionId { get; set; }
+    
+    [JsonPropertyName("clientId")]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public string? ClientId { get; set; }
 }
 
 public class PredictionResult
@@ -150,4 +191,31 @@ public class SimulationCount
 {
     [JsonPropertyName("totalRecords")]
     public int TotalRecords { get; set; }
+    
+    [JsonPropertyName("startTimestamp")]
+    public string? StartTimestamp { get; set; }
+    
+    [JsonPropertyName("endTimestamp")]
+    public string? EndTimestamp { get; set; }
+    
+    [JsonPropertyName("passCount")]
+    public int? PassCount { get; set; }
+    
+    [JsonPropertyName("failCount")]
+    public int? FailCount { get; set; }
+}
+
+public class SimulationSessionInfo
+{
+    [JsonPropertyName("sessionId")]
+    public string SessionId { get; set; } = string.Empty;
+    
+    [JsonPropertyName("totalRecords")]
+    public int TotalRecords { get; set; }
+    
+    [JsonPropertyName("featureColumns")]
+    public List<string> FeatureColumns { get; set; } = new();
+    
+    [JsonPropertyName("ttlSeconds")]
+    public double TtlSeconds { get; set; }
 }
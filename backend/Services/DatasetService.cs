@@ -9,6 +9,9 @@ public class DatasetService : IDatasetService
     private List<dynamic> _dataset = new();
     private string _fileName = string.Empty;
 
+    // Changes on every upload, so callers can cache per dataset without re-reading it
+    public string DatasetVersion { get; private set; } = Guid.NewGuid().ToString("N");
+
     public async Task<DatasetMetadata> ProcessDatasetAsync(IFormFile file)
     {
         _fileName = file.FileName;
@@ -24,6 +27,8 @@ public class DatasetService : IDatasetService
             AddSyntheticTimestamps();
         }
         
+        DatasetVersion = Guid.NewGuid().ToString("N");
+        
         var metadata = new DatasetMetadata
         {
             FileName = _fileName,
@@ -4,6 +4,7 @@ namespace IntelliInspect.API.Services;
 
 public interface IDatasetService
 {
+    string DatasetVersion { get; }
     Task<DatasetMetadata> ProcessDatasetAsync(IFormFile file);
     Task<DateRangeValidation> ValidateDateRangesAsync(DateRangeRequest request);
     Task<List<MonthlyBreakdown>> GetMonthlyBreakdownAsync(DateRangeRequest request);
@@ -5,6 +5,6 @@ namespace IntelliInspect.API.Services;
 public interface IMLService
 {
     Task<TrainingMetrics> TrainModelAsync(TrainingRequest request);
-    Task<PredictionResult> PredictNextAsync(SimulationRequest request);
-    Task<SimulationCount> GetSimulationCountAsync(SimulationRequest request);
+    Task<PredictionResult> PredictNextAsync(SimulationRequest request, string clientId);
+    Task<SimulationCount> GetSimulationCountAsync(SimulationRequest request, string clientId);
 }
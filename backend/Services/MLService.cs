@@ -1,4 +1,6 @@
 using IntelliInspect.API.Models;
+using System.Collections.Concurrent;
+using System.Net;
 using System.Text;
 using System.Text.Json;
 
@@ -6,6 +8,11 @@ namespace IntelliInspect.API.Services;
 
 public class MLService : IMLService
 {
+    // Simulation sessions created on the ML service, one per client for the dataset upload and
+    // simulation window it last ran. Static because the typed HttpClient makes this service transient.
+    private static readonly ConcurrentDictionary<string, (string WindowKey, string SessionId)> _simulationSessions = new();
+    private static readonly TimeSpan TrainingPollInterval = TimeSpan.FromMilliseconds(500);
+
     private readonly HttpClient _httpClient;
     private readonly IDatasetService _datasetService;
     private readonly ILogger<MLService> _logger;
@@ -63,7 +70,10 @@ public class MLService : IMLService
                 TrainingData = trainingData,
                 TestingData = testingData,
                 DataStrategy = dataStrategy,
-                UseSyntheticData = useSyntheticData
+                UseSyntheticData = useSyntheticData,
+                ModelFamily = request.ModelFamily,
+                HyperparameterSearch = request.HyperparameterSearch,
+                SearchTimeBudgetSeconds = request.SearchTimeBudgetSeconds
             };
             
             _logger.LogInformation($"Sending training request with {trainingData.Count} training records, {testingData.Count} testing records, strategy: {dataStrategy}");
@@ -74,19 +84,30 @@ public class MLService : IMLService
             var response = await _httpClient.PostAsync("/train", content);
             response.EnsureSuccessStatusCode();
 
-            var responseContent = await response.Content.ReadAsStringAsync();
-            var metrics = JsonSerializer.Deserialize<TrainingMetrics>(responseContent, new JsonSerializerOptions
+            // Training runs as a background job on the ML service - poll until it finishes
+            var job = await ReadTrainingJobAsync(response);
+            _logger.LogInformation($"Training job {job.JobId} submitted");
+            
+            while (job.Status != "completed" && job.Status != "failed")
             {
-                PropertyNameCaseInsensitive = true
-            });
+                await Task.Delay(TrainingPollInterval);
+                response = await _httpClient.GetAsync($"/train/jobs/{job.JobId}");
+                response.EnsureSuccessStatusCode();
+                job = await ReadTrainingJobAsync(response);
+            }
+            
+            if (job.Status == "failed")
+            {
+                throw new InvalidOperationException($"Training job {job.JobId} failed: {job.Error}");
+            }
 
-            if (metrics == null)
+            if (job.Metrics == null)
             {
                 throw new InvalidOperationException("Failed to deserialize training metrics from ML service");
             }
 
-            _logger.LogInformation("Model training completed successfully");
-            return metrics;
+            _logger.LogInformation($"Model training completed successfully as model {job.ModelId}");
+            return job.Metrics;
         }
         catch (Exception ex)
         {
@@ -95,31 +116,38 @@ public class MLService : IMLService
         }
     }
 
-    public async Task<PredictionResult> PredictNextAsync(SimulationRequest request)
+    private static async Task<TrainingJobStatus> ReadTrainingJobAsync(HttpResponseMessage response)
+    {
+        var responseContent = await response.Content.ReadAsStringAsync();
+        var job = JsonSerializer.Deserialize<TrainingJobStatus>(responseContent, new JsonSerializerOptions
+        {
+            PropertyNameCaseInsensitive = true
+        });
+
+        if (job == null || string.IsNullOrEmpty(job.JobId))
+        {
+            throw new InvalidOperationException("Failed to deserialize training job from ML service");
+        }
+
+        return job;
+    }
+
+    public async Task<PredictionResult> PredictNextAsync(SimulationRequest request, string clientId)
     {
         try
         {
-            // Get actual simulation data for the period
-            var simulationRecords = await _datasetService.GetRecordsInRangeAsync(request.SimulationPeriod);
-            
-            _logger.LogInformation($"Retrieved {simulationRecords.Count} simulation records");
-            
-            // Convert dynamic records to dictionaries for JSON serialization
-            var simulationData = simulationRecords.Select(record => 
-                ((IDictionary<string, object>)record).ToDictionary(kv => kv.Key, kv => kv.Value)
-            ).ToList();
+            // Upload the simulation window once, then only ask the session for the next row
+            var sessionId = await GetOrCreateSimulationSessionAsync(request, clientId);
+            var response = await _httpClient.PostAsync($"/simulation-sessions/{sessionId}/next", null);
             
-            // Create the enhanced simulation request with actual data
-            var enhancedRequest = new SimulationRequest
+            if (response.StatusCode == HttpStatusCode.NotFound || response.StatusCode == HttpStatusCode.Conflict)
             {
-                SimulationPeriod = request.SimulationPeriod,
-                SimulationData = simulationData
-            };
+                // Session expired or the model was retrained with different features - recreate it
+                _logger.LogInformation($"Simulation session {sessionId} is no longer valid, creating a new one");
+                sessionId = await GetOrCreateSimulationSessionAsync(request, clientId, forceNew: true);
+                response = await _httpClient.PostAsync($"/simulation-sessions/{sessionId}/next", null);
+            }
             
-            var json = JsonSerializer.Serialize(enhancedRequest);
-            var content = new StringContent(json, Encoding.UTF8, "application/json");
-
-            var response = await _httpClient.PostAsync("/predict-next", content);
             response.EnsureSuccessStatusCode();
 
             var responseContent = await response.Content.ReadAsStringAsync();
@@ -142,31 +170,79 @@ public class MLService : IMLService
         }
     }
 
-    public async Task<SimulationCount> GetSimulationCountAsync(SimulationRequest request)
+    private async Task<string> GetOrCreateSimulationSessionAsync(SimulationRequest request, string clientId, bool forceNew = false)
+    {
+        // Look the window up before touching the dataset; records are only read to create a session
+        var windowKey = $"{_datasetService.DatasetVersion}|{request.SimulationPeriod.Start}|{request.SimulationPeriod.End}";
+        
+        if (!forceNew && _simulationSessions.TryGetValue(clientId, out var existing) && existing.WindowKey == windowKey)
+        {
+            return existing.SessionId;
+        }
+        
+        var simulationRecords = await _datasetService.GetRecordsInRangeAsync(request.SimulationPeriod);
+        _logger.LogInformation($"Creating simulation session for client {clientId} with {simulationRecords.Count} simulation records");
+        
+        // Convert dynamic records to dictionaries for JSON serialization
+        var simulationData = simulationRecords.Select(record => 
+            ((IDictionary<string, object>)record).ToDictionary(kv => kv.Key, kv => kv.Value)
+        ).ToList();
+        
+        var enhancedRequest = new SimulationRequest
+        {
+            SimulationPeriod = request.SimulationPeriod,
+            SimulationData = simulationData,
+            ClientId = clientId
+        };
+        
+        var json = JsonSerializer.Serialize(enhancedRequest);
+        var content = new StringContent(json, Encoding.UTF8, "application/json");
+
+        var response = await _httpClient.PostAsync("/simulation-sessions", content);
+        response.EnsureSuccessStatusCode();
+
+        var responseContent = await response.Content.ReadAsStringAsync();
+        var session = JsonSerializer.Deserialize<SimulationSessionInfo>(responseContent, new JsonSerializerOptions
+        {
+            PropertyNameCaseInsensitive = true
+        });
+
+        if (session == null || string.IsNullOrEmpty(session.SessionId))
+        {
+            throw new InvalidOperationException("Failed to deserialize simulation session from ML service");
+        }
+
+        _simulationSessions[clientId] = (windowKey, session.SessionId);
+        return session.SessionId;
+    }
+
+    public async Task<SimulationCount> GetSimulationCountAsync(SimulationRequest request, string clientId)
     {
         try
         {
-            // Get actual simulation data for the period
-            var simulationRecords = await _datasetService.GetRecordsInRangeAsync(request.SimulationPeriod);
-            
-            _logger.LogInformation($"Retrieved {simulationRecords.Count} simulation records for count");
+            // Register the simulation window once (the session is reused by PredictNextAsync)
+            // and read the count from its precomputed metadata instead of re-sending the records
+            string sessionId;
+            try
+            {
+                sessionId = await GetOrCreateSimulationSessionAsync(request, clientId);
+            }
+            catch (HttpRequestException ex)
+            {
+                // Sessions need a trained model; before training, count the records here
+                _logger.LogInformation($"Could not create a simulation session ({ex.Message}), counting records locally");
+                return new SimulationCount { TotalRecords = await _datasetService.GetRecordCountInRangeAsync(request.SimulationPeriod) };
+            }
             
-            // Convert dynamic records to dictionaries for JSON serialization
-            var simulationData = simulationRecords.Select(record => 
-                ((IDictionary<string, object>)record).ToDictionary(kv => kv.Key, kv => kv.Value)
-            ).ToList();
+            var response = await PostSimulationCountAsync(request, sessionId);
             
-            // Create the enhanced simulation request with actual data
-            var enhancedRequest = new SimulationRequest
+            if (response.StatusCode == HttpStatusCode.NotFound)
             {
-                SimulationPeriod = request.SimulationPeriod,
-                SimulationData = simulationData
-            };
+                _logger.LogInformation($"Simulation session {sessionId} is no longer valid, creating a new one");
+                sessionId = await GetOrCreateSimulationSessionAsync(request, clientId, forceNew: true);
+                response = await PostSimulationCountAsync(request, sessionId);
+            }
             
-            var json = JsonSerializer.Serialize(enhancedRequest);
-            var content = new StringContent(json, Encoding.UTF8, "application/json");
-
-            var response = await _httpClient.PostAsync("/simulation-count", content);
             response.EnsureSuccessStatusCode();
 
             var responseContent = await response.Content.ReadAsStringAsync();
@@ -188,4 +264,17 @@ public class MLService : IMLService
             throw new InvalidOperationException($"Failed to get simulation count: {ex.Message}", ex);
         }
     }
+
+    private Task<HttpResponseMessage> PostSimulationCountAsync(SimulationRequest request, string sessionId)
+    {
+        var countRequest = new SimulationRequest
+        {
+            SimulationPeriod = request.SimulationPeriod,
+            SessionId = sessionId
+        };
+        
+        var json = JsonSerializer.Serialize(countRequest);
+        var content = new StringContent(json, Encoding.UTF8, "application/json");
+        return _httpClient.PostAsync("/simulation-count", content);
+    }
 }
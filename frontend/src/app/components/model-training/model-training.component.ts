@@ -261,7 +261,7 @@ export class ModelTrainingComponent implements OnInit, AfterViewInit {
         labels: this.trainingMetrics.epochs.map(e => `Epoch ${e}`),
         datasets: [
           {
-            label: 'Training Accuracy',
+            label: 'Held-out Accuracy',
             data: this.trainingMetrics.trainingAccuracy,
             borderColor: '#10b981',
             backgroundColor: 'rgba(16, 185, 129, 0.1)',
@@ -269,7 +269,7 @@ export class ModelTrainingComponent implements OnInit, AfterViewInit {
             fill: true
           },
           {
-            label: 'Training Loss',
+            label: 'Held-out Log Loss',
             data: this.trainingMetrics.trainingLoss,
             borderColor: '#ef4444',
             backgroundColor: 'rgba(239, 68, 68, 0.1)',
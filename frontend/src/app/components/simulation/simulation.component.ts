@@ -1,7 +1,7 @@
 import { Component, OnInit, ViewChild, ElementRef, OnDestroy } from '@angular/core';
 import { CommonModule } from '@angular/common';
 import { Router } from '@angular/router';
-import { HttpClient } from '@angular/common/http';
+import { HttpClient, HttpHeaders } from '@angular/common/http';
 import { HttpClientModule } from '@angular/common/http';
 import { Chart } from 'chart.js';
 import { interval, Subscription } from 'rxjs';
@@ -275,7 +275,7 @@ export class SimulationComponent implements OnInit, OnDestroy {
     const payload = JSON.parse(dateRanges);
     
     // Get simulation period data count
-    this.http.post<{ totalRecords: number }>('http://localhost:8080/api/simulation/get-count', payload)
+    this.http.post<{ totalRecords: number }>('http://localhost:8080/api/simulation/get-count', payload, { headers: this.clientHeaders() })
       .subscribe({
         next: (response) => {
           this.totalRecords = response.totalRecords;
@@ -301,7 +301,7 @@ export class SimulationComponent implements OnInit, OnDestroy {
   }
 
   private processNextPrediction(payload: any): void {
-    this.http.post<PredictionResult>('http://localhost:8080/api/simulation/predict-next', payload)
+    this.http.post<PredictionResult>('http://localhost:8080/api/simulation/predict-next', payload, { headers: this.clientHeaders() })
       .subscribe({
         next: (prediction) => {
           this.predictionStream.unshift(prediction);
@@ -324,6 +324,16 @@ export class SimulationComponent implements OnInit, OnDestroy {
       });
   }
 
+  // Identifies this tab to the backend so concurrent simulations keep separate sessions
+  private clientHeaders(): HttpHeaders {
+    let clientId = sessionStorage.getItem('simulationClientId');
+    if (!clientId) {
+      clientId = Date.now().toString(36) + Math.random().toString(36).slice(2);
+      sessionStorage.setItem('simulationClientId', clientId);
+    }
+    return new HttpHeaders({ 'X-Client-Id': clientId });
+  }
+
   private updateStats(prediction: PredictionResult): void {
     this.simulationStats.totalPredictions++;
     
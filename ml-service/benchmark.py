@@ -0,0 +1,185 @@
+"""Benchmark harness for the IntelliInspect ML service.
+
+Runs the service in-process through FastAPI's TestClient against synthetic
+datasets of increasing size and reports p50/p99 latency, throughput and peak
+RSS for /train (fresh and answered from the training result cache),
+/predict-next, the simulation session /next endpoint, /simulation-count and
+the process_real_data preprocessing stage.
+
+Results are written as JSON so runs can be compared across versions:
+
+    python benchmark.py --sizes 1000,100000,1000000 --output bench.json
+    python benchmark.py --sizes 1000,100000 --compare bench.json
+
+Peak RSS is the process high-water mark (ru_maxrss) after each stage, so it
+only grows over a run; run a single size for an isolated figure.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Keep benchmark models out of the real model store, and request, polling and job logging out of the output
+os.environ.setdefault("MODEL_STORE_DIR", tempfile.mkdtemp(prefix="intelliinspect-bench-"))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import numpy as np
+import sklearn
+from fastapi.testclient import TestClient
+
+import main
+
+DATE_RANGE = {"start": "2025-01-01T00:00:00", "end": "2025-12-31T23:59:59"}
+
+def peak_rss_mb():
+    """Process peak resident set size in MB (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def summarize(name, size, latencies, rows_per_call):
+    """Latency percentiles, throughput and peak RSS for one benchmark stage"""
+    latencies = np.asarray(latencies)
+    total = latencies.sum()
+    return {
+        "benchmark": name,
+        "rows": size,
+        "calls": len(latencies),
+        "p50Ms": float(np.percentile(latencies, 50) * 1000),
+        "p99Ms": float(np.percentile(latencies, 99) * 1000),
+        "meanMs": float(latencies.mean() * 1000),
+        "callsPerSecond": float(len(latencies) / total) if total else 0.0,
+        "rowsPerSecond": float(len(latencies) * rows_per_call / total) if total else 0.0,
+        "peakRssMb": peak_rss_mb()
+    }
+
+def timed(fn, repeats):
+    """Call fn repeatedly and return the per-call wall times in seconds"""
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def check(response):
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.request.url.path} returned {response.status_code}: {response.text[:200]}")
+    return response.json()
+
+def train_and_wait(client, payload):
+    """Submit a training job and poll until it finishes"""
+    job = check(client.post("/train", json=payload))
+    while job["status"] not in ("completed", "failed"):
+        time.sleep(0.01)
+        job = check(client.get(f"/train/jobs/{job['jobId']}"))
+    if job["status"] == "failed":
+        raise RuntimeError(f"Training job failed: {job['error']}")
+    return job
+
+def benchmark_size(client, size, n_features, repeats, predict_requests, inference_engine):
+    """Run every benchmark stage against a synthetic dataset of the given size"""
+    train_df, test_df, _ = main.generate_synthetic_data(n_samples=size, n_features=n_features)
+    training_records = train_df.to_dict("records")
+    testing_records = test_df.to_dict("records")
+    simulation_records = test_df.to_dict("records")
+    results = []
+
+    latencies = timed(lambda: main.process_real_data(training_records, testing_records), repeats)
+    results.append(summarize("process_real_data", size, latencies, size))
+
+    training_payload = {
+        "trainingPeriod": DATE_RANGE,
+        "testingPeriod": DATE_RANGE,
+        "trainingData": training_records,
+        "testingData": testing_records,
+        "dataStrategy": "real_only",
+        "inferenceEngine": inference_engine
+    }
+    def train_uncached():
+        # Identical requests are otherwise answered from the training result cache
+        main.training_result_cache.clear()
+        train_and_wait(client, training_payload)
+
+    latencies = timed(train_uncached, repeats)
+    results.append(summarize("train", size, latencies, size))
+
+    latencies = timed(lambda: train_and_wait(client, training_payload), repeats)
+    results.append(summarize("train-cached", size, latencies, size))
+
+    simulation_payload = {"simulationPeriod": DATE_RANGE, "simulationData": simulation_records}
+    latencies = timed(lambda: check(client.post("/simulation-count", json=simulation_payload)), repeats)
+    results.append(summarize("simulation-count", len(simulation_records), latencies, 1))
+
+    # The legacy path re-sends the whole simulation window on every tick
+    latencies = timed(lambda: check(client.post("/predict-next", json=simulation_payload)), repeats)
+    results.append(summarize("predict-next", len(simulation_records), latencies, 1))
+
+    session = check(client.post("/simulation-sessions", json=simulation_payload))
+    session_path = f"/simulation-sessions/{session['sessionId']}/next"
+    latencies = timed(lambda: check(client.post(session_path)), predict_requests)
+    results.append(summarize("simulation-session-next", len(simulation_records), latencies, 1))
+
+    count_payload = {"simulationPeriod": DATE_RANGE, "sessionId": session["sessionId"]}
+    latencies = timed(lambda: check(client.post("/simulation-count", json=count_payload)), predict_requests)
+    results.append(summarize("simulation-count-session", len(simulation_records), latencies, 1))
+    client.delete(f"/simulation-sessions/{session['sessionId']}")
+
+    return results
+
+def compare(results, baseline_path):
+    """Print the p50 latency ratio of each stage against a previous results file"""
+    with open(baseline_path) as f:
+        baseline = {(r["benchmark"], r["rows"]): r for r in json.load(f)["results"]}
+
+    print(f"\nComparison with {baseline_path} (p50 ratio, < 1.0 is faster):")
+    for result in results:
+        previous = baseline.get((result["benchmark"], result["rows"]))
+        if previous and previous["p50Ms"]:
+            ratio = result["p50Ms"] / previous["p50Ms"]
+            print(f"  {result['benchmark']:<26} {result['rows']:>9} rows  {ratio:6.2f}x")
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark the IntelliInspect ML service")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="Comma-separated dataset row counts")
+    parser.add_argument("--features", type=int, default=3, help="Number of feature columns")
+    parser.add_argument("--repeats", type=int, default=5, help="Calls per stage for /train, /predict-next, /simulation-count and preprocessing")
+    parser.add_argument("--predict-requests", type=int, default=200, help="Calls to the session /next endpoint")
+    parser.add_argument("--inference-engine", default="sklearn", choices=main.INFERENCE_ENGINES, help="Inference engine for the trained models")
+    parser.add_argument("--output", default="benchmark-results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    results = []
+    with TestClient(main.app) as client:
+        for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+            print(f"Benchmarking {size} rows x {args.features} features...")
+            for result in benchmark_size(client, size, args.features, args.repeats, args.predict_requests, args.inference_engine):
+                results.append(result)
+                print(f"  {result['benchmark']:<26} p50 {result['p50Ms']:10.2f} ms  p99 {result['p99Ms']:10.2f} ms  "
+                      f"{result['rowsPerSecond']:14.0f} rows/s  peak RSS {result['peakRssMb']:8.1f} MB")
+
+    report = {
+        "service": main.app.title,
+        "version": main.app.version,
+        "createdAt": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "features": args.features,
+        "inferenceEngine": args.inference_engine,
+        "results": results
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main_cli()
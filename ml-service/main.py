@@ -1,20 +1,36 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Optional
-import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
-import joblib
+import hashlib
+import math
+from functools import lru_cache
+import json
+import re
 import uuid
+import os
+import shutil
+import socket
+import sys
+import time
+import threading
+import warnings
+import multiprocessing
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging; per-prediction logs are DEBUG, with an INFO summary every PREDICTION_LOG_EVERY predictions
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
+PREDICTION_LOG_EVERY = int(os.getenv("PREDICTION_LOG_EVERY", "1000"))
 
 app = FastAPI(title="IntelliInspect ML Service", version="1.0.0")
 
@@ -27,13 +43,116 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global variables to store the trained model and data
-trained_model = None
-training_data = None
-testing_data = None
-simulation_data = None
-simulation_index = 0  # Track current position in simulation data
-feature_columns = None
+# Model registry: every trained model is kept under its own id and /train swaps
+# the active one atomically, so predictions never see a half-trained model. Each
+# worker process keeps its own registry in step with the model store, which other
+# workers train into, activate, switch engines in and delete from
+model_registry = {}  # model_id -> ModelEntry
+active_model_id = None
+active_model_mtime = None  # mtime_ns of active.json when active_model_id was last read from or written to it
+model_registry_lock = threading.Lock()
+
+# Trained models are persisted here and reloaded on startup, so a restart keeps the
+# model. Forest node arrays are stored as .npy files and memory-mapped, so uvicorn
+# workers serving the compiled engine share one copy of them via the page cache; a
+# pickled sklearn estimator is unpickled into each worker's own memory, and only
+# when that worker needs it
+DATA_DIR = os.getenv("DATA_DIR", "data")
+MODEL_STORE_DIR = os.getenv("MODEL_STORE_DIR", os.path.join(DATA_DIR, "models"))
+
+# "all" workers train and predict. "predict" workers reject training requests and
+# serve persisted forests from their node arrays (forest/*.npy), so they never import
+# pandas, scikit-learn or joblib at startup; the training stack is otherwise only
+# imported by the functions that use it, mostly inside training worker processes
+SERVICE_ROLES = ("all", "predict")
+SERVICE_ROLE = os.getenv("SERVICE_ROLE", "all")
+if SERVICE_ROLE not in SERVICE_ROLES:
+    raise ValueError(f"Unsupported SERVICE_ROLE: {SERVICE_ROLE}. Use one of {', '.join(SERVICE_ROLES)}")
+
+# "sklearn" scores with the fitted estimator; "compiled" scores forests from flat
+# node arrays (CompiledForest), with identical probabilities and far less overhead per call
+INFERENCE_ENGINES = ("sklearn", "compiled")
+# Above this many rows sklearn's Cython tree walk is faster than the NumPy one, and
+# since both give the same probabilities large batches go to the fitted estimator
+COMPILED_MAX_BATCH_ROWS = int(os.getenv("COMPILED_MAX_BATCH_ROWS", "512"))
+
+# Training runs in a process pool so fits never block the event loop;
+# the pool size is the number of trainings allowed to run at once
+MAX_CONCURRENT_TRAININGS = int(os.getenv("MAX_CONCURRENT_TRAININGS", "2"))
+MAX_QUEUED_TRAININGS = int(os.getenv("MAX_QUEUED_TRAININGS", "10"))
+MAX_FINISHED_TRAINING_JOBS = 100
+TRAINING_STAGES = 10  # Points on the learning curve reported as epochs
+# Cores each training job may use, so concurrent jobs together fill the machine
+TRAINING_N_JOBS = max(1, (os.cpu_count() or 1) // max(1, MAX_CONCURRENT_TRAININGS))
+
+# Estimators a training request can choose, and the grids its hyperparameter
+# search samples candidates from
+MODEL_FAMILIES = ("random_forest", "extra_trees", "hist_gradient_boosting")
+FOREST_SEARCH_SPACE = {
+    "max_depth": [None, 8, 16, 32],
+    "min_samples_leaf": [1, 2, 5, 10],
+    "max_features": ["sqrt", 0.5, 1.0]
+}
+HYPERPARAMETER_SPACES = {
+    "random_forest": FOREST_SEARCH_SPACE,
+    "extra_trees": FOREST_SEARCH_SPACE,
+    "hist_gradient_boosting": {
+        "learning_rate": [0.03, 0.1, 0.3],
+        "max_leaf_nodes": [15, 31, 63],
+        "min_samples_leaf": [10, 20, 50],
+        "l2_regularization": [0.0, 0.1, 1.0]
+    }
+}
+SEARCH_HALVING_FACTOR = 3  # Successive halving keeps the best third of candidates per round, on 3x the rows
+SEARCH_MIN_SAMPLES = 200  # Rows the first search round trains each candidate on, at least
+training_executor = None
+training_jobs = OrderedDict()  # job_id -> TrainingJob, oldest first
+# Job statuses are also written here, so a poll answered by another worker than the
+# one that accepted the job still finds it; other workers see its submission status until it ends
+TRAINING_JOBS_DIR = os.path.join(MODEL_STORE_DIR, "jobs")
+
+# Identical training requests (same data, strategy and model config) reuse the
+# model they trained last time instead of training again
+TRAINING_CACHE_SIZE = int(os.getenv("TRAINING_CACHE_SIZE", "32"))
+training_result_cache = OrderedDict()  # fingerprint -> model_id, least recently used first
+training_cache_lock = threading.Lock()
+# Stored models kept besides the active one, cached training results and models of
+# live sessions; the oldest others are deleted from the store after each training
+MAX_RETAINED_MODELS = int(os.getenv("MAX_RETAINED_MODELS", "10"))
+
+# Simulation sessions: the simulation window is uploaded once and kept in memory
+# as an already-cast feature matrix, so each tick only reads the next row
+SIMULATION_SESSION_TTL_SECONDS = float(os.getenv("SIMULATION_SESSION_TTL_SECONDS", "1800"))
+SIMULATION_SESSION_MAX_BYTES = int(os.getenv("SIMULATION_SESSION_MAX_BYTES", str(512 * 1024 * 1024)))
+simulation_sessions = OrderedDict()  # session_id -> SimulationSession, least recently used first
+client_sessions = {}  # client id -> session id backing the legacy /predict-next cursor
+simulation_windows = {}  # (client id, (period start, period end) in ns) -> id of the latest session that client registered for it
+
+# Drift monitoring: scored rows are compared with the training distribution of
+# each feature over a rolling window of the latest DRIFT_WINDOW_SIZE rows per session
+DRIFT_WINDOW_SIZE = int(os.getenv("DRIFT_WINDOW_SIZE", "1000"))
+DRIFT_BINS = 10  # Training deciles the population stability index compares against
+DRIFT_REFERENCE_SAMPLE = 100000  # Training rows sampled for the reference in chunked training
+DRIFT_QUANTILES = (0.05, 0.5, 0.95)
+PSI_EPSILON = 1e-4  # Floor for empty bins, which would make the PSI infinite
+PSI_THRESHOLDS = ((0.1, "stable"), (0.25, "moderate"))  # Anything above is "drift"
+
+# Inferred dataset schemas (column roles and numeric features), keyed by a
+# fingerprint of the column names and dtypes, so repeated uploads skip inference
+SCHEMA_CACHE_SIZE = 64
+schema_cache = OrderedDict()  # fingerprint -> DatasetSchema, least recently used first
+TIMESTAMP_COLUMNS = ('timestamp', 'synthetic_timestamp')
+TIMEZONE_SUFFIX = re.compile(r"(?:Z|[+-]\d{2}:?\d{2})$")  # Dropped when parsing, keeping the wall time
+
+# Fallback sensor values used when a record is missing a reading
+SENSOR_COLUMNS = ['Temperature', 'Pressure', 'Humidity']
+SENSOR_DEFAULTS = {'Temperature': 25.0, 'Pressure': 1013.0, 'Humidity': 50.0}
+
+# Synthetic datasets are memoized per parameter set, up to this much memory per process
+SYNTHETIC_CACHE_MAX_BYTES = int(os.getenv("SYNTHETIC_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+SYNTHETIC_START_TIME = "2025-01-01 00:00:00"  # First synthetic_timestamp; rows are one second apart
+synthetic_data_cache = OrderedDict()  # (rows, features, drift, failure rate, seed) -> (train, test, feature columns, bytes)
+synthetic_cache_lock = threading.Lock()
 
 # Pydantic models for request/response
 class DateRange(BaseModel):
@@ -55,6 +174,12 @@ class TrainingRequest(BaseModel):
     testingData: Optional[List[dict]] = []
     useSyntheticData: Optional[bool] = False  # Force synthetic data usage
     dataStrategy: Optional[str] = "auto"  # "auto", "synthetic", "real_only", "mixed"
+    activate: Optional[bool] = True  # Make the new model the one used by default
+    inferenceEngine: Optional[str] = "sklearn"  # "sklearn" or "compiled"
+    modelFamily: Optional[str] = "random_forest"  # "random_forest", "extra_trees", "hist_gradient_boosting"
+    hyperparameterSearch: Optional[bool] = False  # Successive halving over the family's search space
+    searchCandidates: Optional[int] = 16
+    searchTimeBudgetSeconds: Optional[float] = 60.0
 
 class TrainingMetrics(BaseModel):
     accuracy: float
@@ -65,10 +190,16 @@ class TrainingMetrics(BaseModel):
     trainingAccuracy: List[float]
     epochs: List[int]
     confusionMatrix: dict
+    modelId: Optional[str] = None
+    modelFamily: Optional[str] = None
+    hyperparameters: Optional[dict] = None  # Chosen by the search, or the family defaults
 
 class SimulationRequest(BaseModel):
     simulationPeriod: DateRange
     simulationData: Optional[List[dict]] = []
+    clientId: Optional[str] = "default"  # Separate /predict-next cursor per client
+    modelId: Optional[str] = None  # Pin a model; the active model is used otherwise
+    sessionId: Optional[str] = None  # /simulation-count: answer from this session's metadata
 
 class PredictionResult(BaseModel):
     timestamp: str
@@ -81,15 +212,1090 @@ class PredictionResult(BaseModel):
 
 class SimulationCount(BaseModel):
     totalRecords: int
+    sessionId: Optional[str] = None  # Session the count was read from, if any
+    startTimestamp: Optional[str] = None
+    endTimestamp: Optional[str] = None
+    passCount: Optional[int] = None  # Class balance, when the records carry a Response
+    failCount: Optional[int] = None
+
+class SimulationSessionInfo(BaseModel):
+    sessionId: str
+    totalRecords: int
+    featureColumns: List[str]
+    ttlSeconds: float
+    modelId: Optional[str] = None
+    startTimestamp: Optional[str] = None
+    endTimestamp: Optional[str] = None
+    passCount: Optional[int] = None
+    failCount: Optional[int] = None
+
+class BatchPredictionRequest(BaseModel):
+    sessionId: Optional[str] = None  # Score rows of an existing simulation session
+    simulationData: Optional[List[dict]] = []  # Or score these records directly
+    modelId: Optional[str] = None
+    offset: Optional[int] = 0
+    limit: Optional[int] = None
+    chunkSize: Optional[int] = 5000  # Rows per chunk for /predict-stream
+
+class SyntheticDataRequest(BaseModel):
+    rows: int = 1000
+    features: Optional[int] = 3  # At least 3: Temperature/Pressure/Humidity drive the response, Sensor_4... are noise
+    drift: Optional[float] = 0.0  # Shift of the sensor means by the last row, in standard deviations
+    failureRate: Optional[float] = None  # Fraction of Fail rows before drift; about 0.8 when not set
+    seed: Optional[int] = 42
+    chunkSize: Optional[int] = 1000000
+    format: Optional[str] = "csv"  # "csv", or "parquet" with outputPath
+    outputPath: Optional[str] = None  # Write to this file in DATA_DIR instead of streaming the rows back
+
+class FeatureDrift(BaseModel):
+    feature: str
+    mean: Optional[float] = None  # Running mean over every scored row
+    std: Optional[float] = None
+    windowQuantiles: dict = {}  # p05/p50/p95 over the latest windowSize rows
+    trainingMean: Optional[float] = None
+    trainingStd: Optional[float] = None
+    outOfRangeCount: int = 0  # Scored values outside the training min/max
+    psi: Optional[float] = None  # Population stability index of the window against the training deciles
+    status: Optional[str] = None  # "stable", "moderate" or "drift"
+
+class DriftReport(BaseModel):
+    sessionId: str
+    modelId: Optional[str] = None
+    observations: int
+    windowSize: int
+    status: Optional[str] = None  # Worst feature status
+    features: List[FeatureDrift]
+
+class ModelListItem(BaseModel):
+    modelId: str
+    featureColumns: List[str]
+    createdAt: str
+    active: bool
+    accuracy: Optional[float] = None
+    inferenceEngine: str = "sklearn"
+
+class InferenceEngineRequest(BaseModel):
+    inferenceEngine: str  # "sklearn" or "compiled"
+
+class DatasetSchema:
+    """Column roles and numeric feature columns inferred for one dataset layout"""
+
+    def __init__(self, fingerprint, column_mapping, feature_columns, excluded_columns=()):
+        self.fingerprint = fingerprint
+        self.column_mapping = column_mapping    # raw column name -> standardized name
+        self.feature_columns = feature_columns  # standardized numeric feature columns
+        self.excluded_columns = list(excluded_columns)  # candidates skipped for having no numeric values
+
+class ModelEntry:
+    """A trained model together with the feature columns it was fitted on"""
+
+    def __init__(self, model_id, model, columns, metrics, created_at=None, model_path=None):
+        self.model_id = model_id
+        self._model = model
+        self.model_path = model_path  # Pickled estimator to load on first use when model is None
+        self._model_lock = threading.Lock()
+        self.feature_columns = columns
+        self.metrics = metrics
+        self.created_at = created_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.compiled = None  # CompiledForest when the compiled engine is selected
+        self.fingerprint = None  # Training result cache key of the request that trained it
+        self.drift_reference = None  # Per-feature training distribution, see build_drift_reference
+        self.meta_mtime = None  # mtime_ns of the stored meta.json this entry reflects; None if not persisted
+
+    @property
+    def model(self):
+        """The sklearn estimator, unpickled from the model store the first time it is needed"""
+        if self._model is None and self.model_path is not None:
+            with self._model_lock:
+                if self._model is None:
+                    import joblib
+                    self._model = joblib.load(self.model_path)
+        return self._model
+
+    @property
+    def has_estimator(self):
+        return self._model is not None or self.model_path is not None
+
+    @property
+    def inference_engine(self):
+        return "sklearn" if self.compiled is None else "compiled"
+
+    def set_inference_engine(self, engine, compiled=None):
+        """Switch engines; raises ValueError if the model cannot be compiled"""
+        if engine not in INFERENCE_ENGINES:
+            raise ValueError(f"Unsupported inference engine: {engine}. Use one of {', '.join(INFERENCE_ENGINES)}")
+        if engine == "sklearn" and not self.has_estimator:
+            raise ValueError("The sklearn engine is not loaded on prediction-only workers")
+        self.compiled = None if engine == "sklearn" else compiled or CompiledForest.from_forest(self.model)
+
+    def predict_proba(self, X):
+        """Class probabilities from the selected inference engine"""
+        compiled = self.compiled
+        if compiled is not None and (len(X) <= COMPILED_MAX_BATCH_ROWS or not self.has_estimator):
+            return compiled.predict_proba(X)
+        return self.model.predict_proba(X)
+
+class CompiledForest:
+    """A fitted forest classifier flattened into NumPy node arrays for low-latency scoring.
+
+    All trees share one node table and every (tree, row) pair walks down one level per
+    step; pairs drop out of the walk as soon as they reach a leaf. Leaf values are
+    normalized per tree the way DecisionTreeClassifier.predict_proba does it, then
+    summed in tree order and divided by the tree count like
+    RandomForestClassifier.predict_proba, so the probabilities match sklearn exactly.
+    from_forest checks that on probe rows, so a scikit-learn upgrade that changes
+    either step fails compilation instead of silently shifting probabilities.
+    """
+
+    ARRAY_NAMES = ("classes", "roots", "feature", "threshold", "left", "right", "missing_left", "values", "is_leaf")
+
+    def __init__(self, classes, roots, feature, threshold, left, right, missing_left, values, is_leaf=None):
+        self.classes_ = classes
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.values = values
+        self.is_leaf = left == np.arange(len(left)) if is_leaf is None else is_leaf  # Leaves point to themselves
+
+    @classmethod
+    def from_forest(cls, forest):
+        """Compile a fitted RandomForestClassifier (or any forest of single-output decision trees)"""
+        estimators = getattr(forest, "estimators_", None)
+        classes = getattr(forest, "classes_", None)
+        if not estimators or classes is None or not all(hasattr(tree, "tree_") for tree in estimators):
+            raise ValueError(f"Only fitted forest classifiers can be compiled, not {type(forest).__name__}")
+        
+        n_classes = len(classes)
+        roots, feature, threshold, left, right, missing_left, values = [], [], [], [], [], [], []
+        offset = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            if tree.n_outputs != 1 or tree.value.shape[2] != n_classes:
+                raise ValueError("Only single-output trees that saw every class can be compiled")
+            
+            node_ids = np.arange(tree.node_count) + offset
+            is_leaf = tree.children_left < 0
+            roots.append(offset)
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            left.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            right.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            missing_left.append(np.asarray(getattr(tree, "missing_go_to_left", np.zeros(tree.node_count)), dtype=bool))
+            
+            value = np.array(tree.value[:, 0, :], dtype=np.float64)
+            normalizer = value.sum(axis=1)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer[:, np.newaxis])
+            offset += tree.node_count
+        
+        compiled = cls(
+            np.asarray(classes),
+            np.asarray(roots, dtype=np.intp),
+            np.concatenate(feature).astype(np.intp),
+            np.concatenate(threshold).astype(np.float64),
+            np.concatenate(left).astype(np.intp),
+            np.concatenate(right).astype(np.intp),
+            np.concatenate(missing_left),
+            np.concatenate(values)
+        )
+        compiled.check_parity(forest)
+        return compiled
+
+    def check_parity(self, forest, n_rows=512):
+        """Raise ValueError unless predict_proba matches the forest's bit for bit on probe rows.
+
+        Each probe value sits on, just below or just above a split threshold of its
+        feature, so rows take both branches of the splits; a second pass adds missing
+        values where this scikit-learn accepts them.
+        """
+        rng = np.random.default_rng(0)
+        probe = rng.standard_normal((n_rows, forest.n_features_in_)).astype(np.float32)
+        split_nodes = np.flatnonzero(~self.is_leaf)
+        for column in range(probe.shape[1]):
+            nodes = split_nodes[self.feature[split_nodes] == column]
+            if nodes.size:
+                thresholds = np.asarray(self.threshold[rng.choice(nodes, n_rows)], dtype=np.float32)
+                probe[:, column] = np.nextafter(thresholds, thresholds + rng.integers(-1, 2, n_rows))
+        missing = probe.copy()
+        missing[rng.random(missing.shape) < 0.1] = np.nan
+        
+        for X in (probe, missing):
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")  # Probe rows carry no feature names
+                    expected = forest.predict_proba(X)
+            except ValueError:
+                if X is probe:
+                    raise
+                continue  # Rejects missing values, so there is nothing to match
+            if not np.array_equal(self.predict_proba(X), expected):
+                raise ValueError(f"Compiled probabilities differ from {type(forest).__name__}.predict_proba; "
+                                 "keep the sklearn engine")
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a compiled forest written by save, read-only, so processes share its pages"""
+        return cls(**{name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r", allow_pickle=False)
+                      for name in cls.ARRAY_NAMES})
+
+    def save(self, path):
+        """Write one .npy file per node array into a new directory, moved into place once complete"""
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for name in self.ARRAY_NAMES:
+            array = self.classes_ if name == "classes" else getattr(self, name)
+            np.save(os.path.join(tmp_path, f"{name}.npy"), np.asarray(array), allow_pickle=False)
+        os.replace(tmp_path, path)
+
+    def predict_proba(self, X):
+        """Class probabilities for a 2-D feature matrix, as RandomForestClassifier.predict_proba"""
+        X = np.ascontiguousarray(X, dtype=np.float32)  # Trees compare float32 features, like sklearn
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        has_missing = bool(np.isnan(flat).any())
+        
+        # nodes[t * n_rows + i] is where row i currently is in tree t
+        nodes = np.repeat(self.roots, n_rows)
+        row_offsets = np.tile(np.arange(n_rows) * n_features, len(self.roots))
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        while active.size:
+            current = nodes[active]
+            x = flat[row_offsets[active] + self.feature[current]]
+            go_left = x <= self.threshold[current]
+            if has_missing:
+                go_left |= np.isnan(x) & self.missing_left[current]
+            current = np.where(go_left, self.left[current], self.right[current])
+            nodes[active] = current
+            active = active[~self.is_leaf[current]]
+        
+        # Reducing over the leading tree axis adds the trees one after another in order
+        proba = np.add.reduce(self.values[nodes].reshape(len(self.roots), n_rows, -1), axis=0)
+        proba /= len(self.roots)
+        return proba
+
+class ChunkedTrainingRequest(BaseModel):
+    dataPath: str  # CSV or Parquet file, relative to DATA_DIR
+    trainingPeriod: DateRange
+    testingPeriod: DateRange
+    timestampColumn: Optional[str] = None  # Detected from Timestamp/synthetic_timestamp if not given
+    chunkSize: Optional[int] = 100000  # Rows read per batch
+    estimator: Optional[str] = "forest"  # "forest" (trees from per-chunk subsamples) or "sgd" (partial_fit)
+    treesPerChunk: Optional[int] = 10
+    maxSamplesPerChunk: Optional[int] = 50000
+    maxEstimators: Optional[int] = 200  # Trees kept in the forest, reservoir-sampled across chunks
+    activate: Optional[bool] = True
+    inferenceEngine: Optional[str] = "sklearn"  # "compiled" needs estimator "forest"
+
+class TrainingJobStatus(BaseModel):
+    jobId: str
+    status: str  # "queued", "running", "completed", "failed"
+    submittedAt: str
+    completedAt: Optional[str] = None
+    elapsedSeconds: float
+    modelId: Optional[str] = None
+    metrics: Optional[TrainingMetrics] = None
+    error: Optional[str] = None
+    cached: bool = False  # Completed from the training result cache
+
+class TrainingJob:
+    """A training request submitted to the process pool"""
+
+    def __init__(self, job_id, activate=True, inference_engine="sklearn", fingerprint=None):
+        self.job_id = job_id
+        self.activate = activate
+        self.inference_engine = inference_engine
+        self.fingerprint = fingerprint
+        self.cached = False
+        self.future = None
+        self.status = "queued"
+        self.submitted_at = datetime.now()
+        self.completed_at = None
+        self.metrics = None
+        self.error = None
+
+    def is_finished(self):
+        return self.status in ("completed", "failed")
+
+    def to_status(self):
+        status = self.status
+        if not self.is_finished() and self.future is not None and self.future.running():
+            status = "running"
+        end = self.completed_at or datetime.now()
+        return TrainingJobStatus(
+            jobId=self.job_id,
+            status=status,
+            submittedAt=self.submitted_at.strftime("%Y-%m-%d %H:%M:%S"),
+            completedAt=self.completed_at.strftime("%Y-%m-%d %H:%M:%S") if self.completed_at else None,
+            elapsedSeconds=(end - self.submitted_at).total_seconds(),
+            modelId=self.metrics.modelId if self.metrics else None,
+            metrics=self.metrics,
+            error=self.error,
+            cached=self.cached
+        )
+
+class Histogram:
+    """Prometheus-style histogram with fixed buckets, one series per label set"""
+
+    def __init__(self, name, description, label_names, buckets):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}  # label values -> [bucket counts, sum, count]
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_values, (bucket_counts, total, count) in sorted(self.series.items()):
+                labels = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, label_values))
+                prefix = labels + "," if labels else ""
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {bucket_count}')
+                lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+                lines.append(f"{self.name}_sum{{{labels}}} {total}")
+                lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+class Counter:
+    """Prometheus-style monotonically increasing counter"""
+
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+            return self.value
+
+    def render(self):
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter", f"{self.name} {self.value}"]
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route and status code"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        token = request_started_at.set(start)
+        status_code = 500
+        
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            REQUEST_LATENCY.observe(time.perf_counter() - start, scope["method"], path, str(status_code))
+            request_started_at.reset(token)
+
+class SimulationWindowIndex:
+    """Timestamp index and class-balance prefix sums of a simulation window.
+    
+    Built once when the window is registered, so its count, time range and class
+    balance, overall or for any sub-range of time, are lookups rather than passes
+    over the records: O(1) for the whole window, two binary searches for a range.
+    """
+
+    def __init__(self, timestamps, response):
+        # timestamps: datetime64[ns] per record (NaT if unknown); response: 1/0 per record, NaN if unknown
+        has_time = ~np.isnat(timestamps)
+        order = np.argsort(timestamps[has_time], kind="stable")
+        self.sorted_times = timestamps[has_time][order].astype(np.int64)
+        
+        passed = response == 1
+        labeled = ~np.isnan(response)
+        self.total_records = len(timestamps)
+        self.pass_count = int(passed.sum()) if labeled.any() else None
+        self.fail_count = int(labeled.sum()) - self.pass_count if labeled.any() else None
+        
+        # Prefix sums over the time-sorted records: passes/labels among the first i
+        self.cumulative_passes = np.concatenate(([0], np.cumsum(passed[has_time][order], dtype=np.int32)))
+        self.cumulative_labeled = np.concatenate(([0], np.cumsum(labeled[has_time][order], dtype=np.int32)))
+        self.nbytes = self.sorted_times.nbytes + self.cumulative_passes.nbytes + self.cumulative_labeled.nbytes
+
+    def stats(self, start_ns=None, end_ns=None):
+        """Count, time range and class balance of the whole window, or of records within [start, end]"""
+        if start_ns is None:
+            lo, hi, total = 0, len(self.sorted_times), self.total_records
+            passes, fails = self.pass_count, self.fail_count
+        else:
+            lo = int(np.searchsorted(self.sorted_times, start_ns, side="left"))
+            hi = int(np.searchsorted(self.sorted_times, end_ns, side="right"))
+            total = hi - lo
+            labeled = int(self.cumulative_labeled[hi] - self.cumulative_labeled[lo])
+            passes = int(self.cumulative_passes[hi] - self.cumulative_passes[lo]) if labeled else None
+            fails = labeled - passes if labeled else None
+        
+        return {
+            "totalRecords": total,
+            "startTimestamp": format_timestamp_ns(self.sorted_times[lo]) if hi > lo else None,
+            "endTimestamp": format_timestamp_ns(self.sorted_times[hi - 1]) if hi > lo else None,
+            "passCount": passes,
+            "failCount": fails
+        }
+
+class DriftMonitor:
+    """Streaming statistics of the feature rows a session scores, against the training distribution.
+    
+    Updates are vectorized and O(1) per row, with memory bounded by the window:
+    running mean/variance over the whole stream (Welford, combined per batch with
+    Chan's formula), a count of values outside the training range, and a ring
+    buffer of the latest rows from which reports take rolling quantiles and the
+    population stability index against the training decile bins.
+    """
+
+    def __init__(self, model_id, feature_columns, reference=None, window_size=DRIFT_WINDOW_SIZE):
+        n_features = len(feature_columns)
+        self.model_id = model_id
+        self.feature_columns = list(feature_columns)
+        if reference and [ref["feature"] for ref in reference] != self.feature_columns:
+            reference = None
+        self.reference = reference
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+        self.out_of_range = np.zeros(n_features, dtype=np.int64)
+        self.window = np.empty((max(1, window_size), n_features), dtype=np.float32)
+        if reference:
+            self.low = np.array([ref["min"] for ref in reference])
+            self.high = np.array([ref["max"] for ref in reference])
+        self.lock = threading.Lock()
+
+    def update(self, rows):
+        """Add a (rows, features) block of scored feature values"""
+        rows = np.asarray(rows, dtype=np.float64)
+        n = len(rows)
+        if n == 0:
+            return
+        
+        batch_mean = rows.mean(axis=0)
+        batch_m2 = ((rows - batch_mean) ** 2).sum(axis=0)
+        with self.lock:
+            total = self.count + n
+            delta = batch_mean - self.mean
+            self.mean += delta * (n / total)
+            self.m2 += batch_m2 + delta ** 2 * (self.count * n / total)
+            if self.reference:
+                self.out_of_range += ((rows < self.low) | (rows > self.high)).sum(axis=0)
+            
+            tail = rows[-len(self.window):]
+            self.window[(total - len(tail) + np.arange(len(tail))) % len(self.window)] = tail
+            self.count = total
+
+    def report(self, session_id):
+        """Running moments, rolling quantiles and PSI per feature"""
+        with self.lock:
+            count = self.count
+            mean = self.mean.copy()
+            variance = self.m2 / (count - 1) if count > 1 else None
+            out_of_range = self.out_of_range.copy()
+            window = self.window[:min(count, len(self.window))].copy()  # Row order does not matter below
+        
+        quantiles = np.quantile(window, DRIFT_QUANTILES, axis=0) if len(window) else None
+        features = []
+        for i, feature in enumerate(self.feature_columns):
+            ref = self.reference[i] if self.reference else None
+            psi = population_stability_index(window[:, i], ref) if ref and len(window) else None
+            features.append(FeatureDrift(
+                feature=feature,
+                mean=float(mean[i]) if count else None,
+                std=float(np.sqrt(variance[i])) if variance is not None else None,
+                windowQuantiles={f"p{round(q * 100):02d}": float(quantiles[j, i]) for j, q in enumerate(DRIFT_QUANTILES)}
+                                if quantiles is not None else {},
+                trainingMean=ref["mean"] if ref else None,
+                trainingStd=ref["std"] if ref else None,
+                outOfRangeCount=int(out_of_range[i]),
+                psi=psi,
+                status=drift_status(psi)
+            ))
+        
+        order = [status for _, status in PSI_THRESHOLDS] + ["drift"]
+        statuses = [f.status for f in features if f.status is not None]
+        return DriftReport(
+            sessionId=session_id,
+            modelId=self.model_id,
+            observations=count,
+            windowSize=len(self.window),
+            status=max(statuses, key=order.index) if statuses else None,
+            features=features
+        )
+
+class SimulationSession:
+    """A simulation window materialized once for repeated prediction ticks"""
+
+    def __init__(self, session_id, features, sensors, timestamps, columns, model_id=None, index=None, period=None,
+                 raw_timestamps=None):
+        self.session_id = session_id
+        self.features = features      # float32 matrix in model feature order
+        self.sensors = sensors        # float64 Temperature/Pressure/Humidity for the response
+        self.timestamps = timestamps  # datetime64[ns] per record, NaT where unknown
+        self.raw_timestamps = raw_timestamps  # Object array of the strings that did not parse, None elsewhere; or None
+        self.feature_columns = columns
+        self.model_id = model_id      # None follows the active model
+        self.index = index            # SimulationWindowIndex over the records
+        self.period = period          # (start, end) in ns of the simulation period the window was sent for
+        self.client_id = None         # Client that opened the session; period lookups only answer from its own windows
+        self.cursor = 0
+        self.drift_monitor = None     # DriftMonitor over the rows scored so far
+        self.lock = threading.Lock()
+        self.last_access = time.monotonic()
+        self.created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Shown for records without a timestamp
+        self.nbytes = features.nbytes + sensors.nbytes + timestamps.nbytes + (index.nbytes if index is not None else 0)
+        if raw_timestamps is not None:
+            self.nbytes += raw_timestamps.nbytes + sum(sys.getsizeof(text) for text in raw_timestamps.tolist() if text is not None)
+
+    def __len__(self):
+        return self.features.shape[0]
+
+    def window_stats(self, period):
+        """Metadata of the whole window if it was sent for this period, else of its records within the period"""
+        if period is None or self.period == period or len(self.index.sorted_times) == 0:
+            return self.index.stats()
+        return self.index.stats(*period)
+
+    def is_expired(self, now):
+        return now - self.last_access > SIMULATION_SESSION_TTL_SECONDS
+
+    def timestamp_strings(self, start, stop):
+        """Record timestamps of rows [start, stop) as response strings, as sent if they did not parse"""
+        text = format_timestamps(self.timestamps[start:stop], self.created_at)
+        if self.raw_timestamps is None:
+            return text
+        return [value if raw is None else raw for value, raw in zip(text, self.raw_timestamps[start:stop].tolist())]
+
+    def advance(self):
+        """Return the current row and move the cursor, wrapping around at the end"""
+        with self.lock:
+            if self.cursor >= len(self):
+                self.cursor = 0  # Wrap around to beginning
+            row = self.cursor
+            self.cursor += 1
+            return row
 
 @app.get("/")
 async def root():
     return {"message": "IntelliInspect ML Service is running"}
 
+# Service metrics exposed at /metrics
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+REQUEST_LATENCY = Histogram("ml_request_duration_seconds", "HTTP request latency", ("method", "path", "status"), LATENCY_BUCKETS)
+STAGE_LATENCY = Histogram("ml_stage_duration_seconds", "Time spent per pipeline stage", ("stage",), LATENCY_BUCKETS)
+PREDICTIONS = Counter("ml_predictions_total", "Rows scored by the model")
+request_started_at = ContextVar("request_started_at", default=None)
+app.add_middleware(MetricsMiddleware)
+
+@contextmanager
+def track_stage(stage, timings=None):
+    """Time a pipeline stage into the stage histogram, or into timings inside a training worker"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if timings is None:
+            STAGE_LATENCY.observe(elapsed, stage)
+        else:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+def track_parse_stage():
+    """Record the time from request arrival to handler entry (body read and validation)"""
+    started_at = request_started_at.get()
+    if started_at is not None:
+        STAGE_LATENCY.observe(time.perf_counter() - started_at, "parse")
+
+def count_predictions(rows):
+    """Count scored rows and log a sampled summary instead of every prediction"""
+    total = PREDICTIONS.inc(rows)
+    if PREDICTION_LOG_EVERY > 0 and total // PREDICTION_LOG_EVERY != (total - rows) // PREDICTION_LOG_EVERY:
+        logger.info(f"Served {total} predictions")
+
+def current_rss_bytes():
+    """Resident set size of this process, from /proc where available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of request, stage, inference and session metrics"""
+    job_counts = {}
+    for job in list(training_jobs.values()):
+        status = job.to_status().status
+        job_counts[status] = job_counts.get(status, 0) + 1
+    
+    sessions = list(simulation_sessions.values())
+    gauges = [
+        ("ml_active_simulation_sessions", "Live simulation sessions", len(sessions)),
+        ("ml_simulation_session_bytes", "Memory held by simulation sessions", sum(session.nbytes for session in sessions)),
+        ("ml_registered_models", "Models in the registry", len(model_registry)),
+        ("ml_process_resident_memory_bytes", "Resident memory of the service process", current_rss_bytes())
+    ]
+    
+    lines = REQUEST_LATENCY.render() + STAGE_LATENCY.render() + PREDICTIONS.render()
+    for name, description, value in gauges:
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} gauge", f"{name} {value}"]
+    lines += ["# HELP ml_training_jobs Training jobs by status", "# TYPE ml_training_jobs gauge"]
+    lines += [f'ml_training_jobs{{status="{status}"}} {count}' for status, count in sorted(job_counts.items())]
+    
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+@app.on_event("startup")
+async def load_model_store():
+    """Warm start: load every persisted model and restore the active one, whose estimator is unpickled up front"""
+    global active_model_id
+    
+    if not os.path.isdir(MODEL_STORE_DIR):
+        return
+    
+    refresh_active_model_id()
+    for model_id in sorted(os.listdir(MODEL_STORE_DIR)):
+        if model_id in model_registry or not os.path.isfile(os.path.join(MODEL_STORE_DIR, model_id, "meta.json")):
+            continue
+        try:
+            entry = load_stored_model(model_id, eager=model_id == active_model_id)
+            with model_registry_lock:
+                model_registry[entry.model_id] = entry
+        except Exception as e:
+            logger.warning(f"Skipping stored model {model_id}: {str(e)}")
+    
+    with model_registry_lock:
+        if active_model_id not in model_registry:
+            active_model_id = None
+    
+    for entry in sorted(model_registry.values(), key=lambda entry: entry.created_at):
+        if entry.fingerprint:
+            cache_training_result(entry.fingerprint, entry.model_id)
+    
+    logger.info(f"Loaded {len(model_registry)} stored models from {MODEL_STORE_DIR}, active model: {active_model_id}")
+
+@app.get("/models")
+async def list_models():
+    """List the models in the model store (and any this worker could not persist)"""
+    await run_in_threadpool(sync_model_store)
+    return [
+        ModelListItem(
+            modelId=entry.model_id,
+            featureColumns=entry.feature_columns,
+            createdAt=entry.created_at,
+            active=entry.model_id == active_model_id,
+            accuracy=entry.metrics.get("accuracy"),
+            inferenceEngine=entry.inference_engine
+        )
+        for entry in list(model_registry.values())
+    ]
+
+@app.post("/models/{model_id}/activate")
+async def activate_model(model_id: str):
+    """Make a stored model the one used by default for predictions"""
+    entry = get_model_entry(model_id)
+    set_active_model(entry)
+    
+    logger.info(f"Activated model {entry.model_id}")
+    
+    return {"modelId": entry.model_id, "active": True}
+
+@app.post("/models/{model_id}/inference-engine")
+async def set_model_inference_engine(model_id: str, request: InferenceEngineRequest):
+    """Choose how a model scores rows: the sklearn estimator or the compiled forest"""
+    entry = get_model_entry(model_id)
+    try:
+        await run_in_threadpool(entry.set_inference_engine, request.inferenceEngine)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    save_model_metadata(entry)
+    
+    logger.info(f"Model {entry.model_id} now uses the {entry.inference_engine} inference engine")
+    
+    return {"modelId": entry.model_id, "inferenceEngine": entry.inference_engine}
+
+@app.delete("/models/{model_id}")
+async def delete_model(model_id: str):
+    """Remove a model from the registry and the model store"""
+    global active_model_id
+    
+    with model_registry_lock:
+        entry = model_registry.pop(model_id, None)
+        was_active = active_model_id == model_id
+        if was_active:
+            active_model_id = None
+    
+    model_dir = os.path.join(MODEL_STORE_DIR, os.path.basename(model_id))
+    if entry is None and not os.path.isdir(model_dir):
+        raise HTTPException(status_code=404, detail=f"Model {model_id} not found")
+    
+    shutil.rmtree(model_dir, ignore_errors=True)
+    if was_active:
+        save_active_model_id(None)
+    
+    logger.info(f"Deleted model {model_id}")
+    
+    return {"modelId": model_id, "deleted": True}
+
+@app.on_event("shutdown")
+async def shutdown_training_executor():
+    if training_executor is not None:
+        training_executor.shutdown(wait=False, cancel_futures=True)
+
 @app.post("/train")
 async def train_model(request: TrainingRequest):
-    """Train the machine learning model using the specified date ranges"""
-    global trained_model, training_data, testing_data, feature_columns
+    """Submit a training job to the process pool and return its job id immediately"""
+    try:
+        track_parse_stage()
+        require_training_role()
+        validate_model_options(request.modelFamily, request.inferenceEngine, request.hyperparameterSearch,
+                               request.searchCandidates, request.searchTimeBudgetSeconds)
+        request_data = request.model_dump()
+        fingerprint = await run_in_threadpool(training_fingerprint, "train", {k: v for k, v in request_data.items() if k != "activate"})
+        job = submit_training_job(request.activate, run_training_job, request_data,
+                                  inference_engine=request.inferenceEngine, fingerprint=fingerprint)
+        return job.to_status()
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error submitting training job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Training failed: {str(e)}")
+
+@app.post("/train-columnar")
+async def train_model_columnar(
+    trainingFile: UploadFile = File(...),
+    testingFile: Optional[UploadFile] = File(None),
+    format: str = Form("arrow"),
+    columns: Optional[str] = Form(None),
+    activate: bool = Form(True),
+    inferenceEngine: str = Form("sklearn"),
+    modelFamily: str = Form("random_forest"),
+    hyperparameterSearch: bool = Form(False),
+    searchCandidates: int = Form(16),
+    searchTimeBudgetSeconds: float = Form(60.0)
+):
+    """Submit a training job from Arrow IPC, Parquet or raw float32 column uploads.
+    
+    The uploads go straight into column arrays instead of one dict per record, which
+    is what dominates time and memory for large windows on the JSON /train path.
+    Without a testing file, 30% of the training rows are held out for evaluation.
+    """
+    try:
+        require_training_role()
+        validate_model_options(modelFamily, inferenceEngine, hyperparameterSearch, searchCandidates, searchTimeBudgetSeconds)
+        training_bytes = await trainingFile.read()
+        testing_bytes = await testingFile.read() if testingFile is not None else b""
+        model_options = get_model_options(modelFamily, hyperparameterSearch, searchCandidates, searchTimeBudgetSeconds)
+        fingerprint = await run_in_threadpool(
+            training_fingerprint, "train-columnar",
+            {"format": format, "columns": columns, "inferenceEngine": inferenceEngine, **model_options},
+            training_bytes, testing_bytes
+        )
+        
+        with track_stage("parse"):
+            training_df = await run_in_threadpool(read_columnar_upload, training_bytes, format, columns)
+            testing_df = None
+            if testingFile is not None:
+                testing_df = await run_in_threadpool(read_columnar_upload, testing_bytes, format, columns)
+        
+        logger.info(f"Received columnar ({format}) training data: {len(training_df)} training records, "
+                    f"{len(testing_df) if testing_df is not None else 0} testing records")
+        
+        job = submit_training_job(activate, run_columnar_training_job, training_df, testing_df, model_options,
+                                  inference_engine=inferenceEngine, fingerprint=fingerprint)
+        return job.to_status()
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error submitting columnar training job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Training failed: {str(e)}")
+
+@app.post("/train-chunked")
+async def train_model_chunked(request: ChunkedTrainingRequest):
+    """Submit an out-of-core training job that streams the date ranges from a local file"""
+    try:
+        require_training_role()
+        if request.estimator not in ("forest", "sgd"):
+            raise HTTPException(status_code=400, detail=f"Unsupported estimator: {request.estimator}. Use forest or sgd")
+        validate_inference_engine(request.inferenceEngine)
+        if request.inferenceEngine == "compiled" and request.estimator != "forest":
+            raise HTTPException(status_code=400, detail="The compiled inference engine needs estimator forest")
+        data_file = os.stat(resolve_data_path(request.dataPath))
+        
+        # The file is identified by size and modification time rather than hashed, since it can be far larger than memory
+        request_data = request.model_dump()
+        fingerprint = training_fingerprint("train-chunked", {
+            **{k: v for k, v in request_data.items() if k != "activate"},
+            "fileSize": data_file.st_size,
+            "fileModifiedNs": data_file.st_mtime_ns
+        })
+        job = submit_training_job(request.activate, run_chunked_training_job, request_data,
+                                  inference_engine=request.inferenceEngine, fingerprint=fingerprint)
+        return job.to_status()
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error submitting chunked training job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Training failed: {str(e)}")
+
+@app.get("/train/jobs/{job_id}")
+async def get_training_job(job_id: str):
+    """Poll a training job for its status and, once completed, its metrics"""
+    job = training_jobs.get(job_id)
+    if job is not None:
+        return job.to_status()
+    
+    status = load_training_job_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Training job {job_id} not found")
+    return status
+
+def get_training_executor():
+    """Create the training process pool on first use"""
+    global training_executor
+    
+    if training_executor is None:
+        # spawn rather than fork: the service process runs threads (event loop, executor)
+        training_executor = ProcessPoolExecutor(
+            max_workers=MAX_CONCURRENT_TRAININGS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return training_executor
+
+def require_training_role():
+    if SERVICE_ROLE != "all":
+        raise HTTPException(status_code=503, detail=f"Training is disabled on {SERVICE_ROLE} workers (SERVICE_ROLE={SERVICE_ROLE})")
+
+def validate_inference_engine(engine):
+    if engine not in INFERENCE_ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unsupported inference engine: {engine}. Use one of {', '.join(INFERENCE_ENGINES)}")
+
+def validate_model_options(model_family, inference_engine, hyperparameter_search, search_candidates, search_time_budget):
+    """Reject model family, engine and search settings a training job could not honour"""
+    validate_inference_engine(inference_engine)
+    if model_family not in MODEL_FAMILIES:
+        raise HTTPException(status_code=400, detail=f"Unsupported model family: {model_family}. Use one of {', '.join(MODEL_FAMILIES)}")
+    if inference_engine == "compiled" and model_family == "hist_gradient_boosting":
+        raise HTTPException(status_code=400, detail="The compiled inference engine needs a random_forest or extra_trees model")
+    if hyperparameter_search and (search_candidates < 1 or search_time_budget <= 0):
+        raise HTTPException(status_code=400, detail="searchCandidates and searchTimeBudgetSeconds must be positive")
+
+def get_model_options(model_family, hyperparameter_search, search_candidates, search_time_budget):
+    """Keyword arguments for fit_and_evaluate from a training request"""
+    return {
+        "model_family": model_family,
+        "search_candidates": search_candidates if hyperparameter_search else 0,
+        "search_time_budget": search_time_budget
+    }
+
+def submit_training_job(activate, fn, *args, inference_engine="sklearn", fingerprint=None):
+    """Queue a training function on the pool and track it as a job.
+    
+    With a fingerprint, a request identical to an earlier one completes at once with
+    the cached model, and one identical to a job still running joins that job.
+    """
+    if fingerprint is not None:
+        entry = get_cached_training_result(fingerprint)
+        if entry is not None:
+            return complete_cached_training_job(entry, activate)
+        for job in list(training_jobs.values()):
+            if job.fingerprint == fingerprint and not job.is_finished():
+                logger.info(f"Identical training request joined running job {job.job_id}")
+                job.activate = job.activate or activate
+                return job
+    
+    pending = sum(1 for job in list(training_jobs.values()) if not job.is_finished())
+    if pending >= MAX_QUEUED_TRAININGS:
+        raise HTTPException(status_code=429, detail="Too many training jobs in progress. Please retry later.")
+    
+    job = TrainingJob(f"JOB_{uuid.uuid4().hex[:12].upper()}", activate=activate, inference_engine=inference_engine,
+                      fingerprint=fingerprint)
+    job.future = submit_training(fn, *args)
+    training_jobs[job.job_id] = job
+    save_training_job(job)
+    job.future.add_done_callback(lambda future: complete_training_job(job, future))
+    prune_training_jobs()
+    
+    logger.info(f"Submitted training job {job.job_id} ({pending + 1} pending)")
+    return job
+
+def complete_cached_training_job(entry, activate):
+    """Record a job that is answered by a model from the training result cache"""
+    job = TrainingJob(f"JOB_{uuid.uuid4().hex[:12].upper()}", activate=activate,
+                      inference_engine=entry.inference_engine, fingerprint=entry.fingerprint)
+    job.metrics = TrainingMetrics(**entry.metrics, modelId=entry.model_id)
+    job.status = "completed"
+    job.cached = True
+    job.completed_at = job.submitted_at
+    if activate:
+        set_active_model(entry)
+    
+    training_jobs[job.job_id] = job
+    save_training_job(job)
+    prune_training_jobs()
+    
+    logger.info(f"Training request matched cached model {entry.model_id}, job {job.job_id} completed from cache")
+    return job
+
+def training_fingerprint(kind, payload, *blobs):
+    """Content hash of a training payload and its strategy and model config; the training result cache key"""
+    digest = hashlib.sha256(kind.encode())
+    digest.update(json.dumps(payload, sort_keys=True, default=str).encode())
+    for blob in blobs:
+        digest.update(len(blob).to_bytes(8, "little"))
+        digest.update(blob)
+    return digest.hexdigest()
+
+def get_cached_training_result(fingerprint):
+    """The model an identical request trained, if it is still cached and stored"""
+    with training_cache_lock:
+        model_id = training_result_cache.get(fingerprint)
+        if model_id is not None:
+            training_result_cache.move_to_end(fingerprint)
+    if model_id is None:
+        return None
+    
+    try:
+        return get_model_entry(model_id)
+    except HTTPException:
+        # The model was deleted since
+        with training_cache_lock:
+            training_result_cache.pop(fingerprint, None)
+        return None
+
+def cache_training_result(fingerprint, model_id):
+    """Remember which model a request produced, evicting the least recently used beyond the size limit"""
+    with training_cache_lock:
+        training_result_cache[fingerprint] = model_id
+        training_result_cache.move_to_end(fingerprint)
+        while len(training_result_cache) > TRAINING_CACHE_SIZE:
+            training_result_cache.popitem(last=False)
+
+def submit_training(fn, *args):
+    """Submit work to the training pool, replacing the pool once if a worker died"""
+    global training_executor
+    
+    try:
+        return get_training_executor().submit(fn, *args)
+    except BrokenProcessPool:
+        logger.warning("Training process pool was broken, starting a new one")
+        training_executor = None
+        return get_training_executor().submit(fn, *args)
+
+def complete_training_job(job, future):
+    """Register the model a finished job produced; runs on the executor's callback thread"""
+    global training_executor
+    
+    try:
+        model, columns, metrics, timings, drift_reference = future.result()
+        for stage, seconds in timings.items():
+            STAGE_LATENCY.observe(seconds, stage)
+        entry = register_model(model, columns, metrics, activate=job.activate, inference_engine=job.inference_engine,
+                               fingerprint=job.fingerprint, drift_reference=drift_reference)
+        job.metrics = TrainingMetrics(**metrics, modelId=entry.model_id)
+        job.status = "completed"
+        logger.info(f"Training job {job.job_id} completed as model {entry.model_id}. Accuracy: {metrics['accuracy']:.2f}%")
+    except Exception as e:
+        if isinstance(e, BrokenProcessPool):
+            training_executor = None  # Start a fresh pool for the next job
+        job.error = str(e) or type(e).__name__
+        job.status = "failed"
+        logger.error(f"Training job {job.job_id} failed: {job.error}")
+    finally:
+        job.completed_at = datetime.now()
+        save_training_job(job)
+
+def prune_training_jobs():
+    """Forget the oldest finished jobs beyond the retention limit"""
+    finished = [job_id for job_id, job in list(training_jobs.items()) if job.is_finished()]
+    for job_id in finished[:max(0, len(finished) - MAX_FINISHED_TRAINING_JOBS)]:
+        training_jobs.pop(job_id, None)
+        try:
+            os.remove(os.path.join(TRAINING_JOBS_DIR, f"{job_id}.json"))
+        except OSError:
+            pass
+
+def save_training_job(job):
+    """Write a job's status to the jobs directory, with the worker process that runs it"""
+    path = os.path.join(TRAINING_JOBS_DIR, f"{job.job_id}.json")
+    try:
+        os.makedirs(TRAINING_JOBS_DIR, exist_ok=True)
+        with open(path + ".tmp", "w") as f:
+            json.dump({**job.to_status().model_dump(), "host": socket.gethostname(), "pid": os.getpid()}, f)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        logger.warning(f"Could not record training job {job.job_id} in {TRAINING_JOBS_DIR}: {str(e)}")
+
+def load_training_job_status(job_id):
+    """Status of a job accepted by another worker, as that worker last wrote it; None if unknown"""
+    try:
+        with open(os.path.join(TRAINING_JOBS_DIR, f"{os.path.basename(job_id)}.json")) as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    host, pid = stored.pop("host", None), stored.pop("pid", None)
+    status = TrainingJobStatus(**stored)
+    if status.completedAt is None:
+        if host == socket.gethostname() and pid is not None and not process_alive(pid):
+            # The worker exited with the job unfinished, so nobody will complete it
+            status.status = "failed"
+            status.error = "The worker running this training job exited"
+        else:
+            submitted_at = datetime.strptime(status.submittedAt, "%Y-%m-%d %H:%M:%S")
+            status.elapsedSeconds = (datetime.now() - submitted_at).total_seconds()
+    return status
+
+def process_alive(pid):
+    """Whether a process on this host is still running"""
+    if os.name != "posix":
+        return True  # os.kill would terminate the process on Windows
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # Running, but owned by another user
+    return True
+
+def run_training_job(request_data):
+    """Train a model for one request; runs inside a training worker process"""
+    request = TrainingRequest(**request_data)
+    timings = {}
     
     try:
         logger.info(f"Training model with training period: {request.trainingPeriod.start} to {request.trainingPeriod.end}")
@@ -123,7 +1329,7 @@ async def train_model(request: TrainingRequest):
                 raise ValueError("Real testing data required but not provided")
             
             logger.info(f"Using real data only - Training: {len(request.trainingData)}, Testing: {len(request.testingData)}")
-            training_data, testing_data, feature_columns = process_real_data(request.trainingData, request.testingData)
+            training_data, testing_data, feature_columns = process_real_data(request.trainingData, request.testingData, timings)
             
         elif data_strategy == "mixed":
             # Use real training data with synthetic testing data if testing data is missing
@@ -131,11 +1337,11 @@ async def train_model(request: TrainingRequest):
                 if hasattr(request, 'testingData') and request.testingData and len(request.testingData) > 0:
                     # Both available - use real data
                     logger.info(f"Using real data - Training: {len(request.trainingData)}, Testing: {len(request.testingData)}")
-                    training_data, testing_data, feature_columns = process_real_data(request.trainingData, request.testingData)
+                    training_data, testing_data, feature_columns = process_real_data(request.trainingData, request.testingData, timings)
                 else:
                     # Only training data available - use real training with synthetic testing
                     logger.info(f"Mixed approach: Real training data ({len(request.trainingData)} records) with synthetic testing data")
-                    real_training_data, _, real_feature_columns = process_real_data(request.trainingData, request.trainingData)
+                    real_training_data, _, real_feature_columns = process_real_data(request.trainingData, request.trainingData, timings)
                     synthetic_training_data, synthetic_testing_data, synthetic_feature_columns = generate_synthetic_data()
                     
                     # Use real training data and synthetic testing data
@@ -155,7 +1361,7 @@ async def train_model(request: TrainingRequest):
                     # Case 1: Both training and testing data provided - use real data
                     logger.info(f"Auto: Using real dataset - Training records: {len(request.trainingData)}, Testing records: {len(request.testingData)}")
                     try:
-                        training_data, testing_data, feature_columns = process_real_data(request.trainingData, request.testingData)
+                        training_data, testing_data, feature_columns = process_real_data(request.trainingData, request.testingData, timings)
                     except Exception as e:
                         logger.warning(f"Auto: Error processing real data: {str(e)}. Falling back to synthetic data.")
                         training_data, testing_data, feature_columns = generate_synthetic_data()
@@ -168,81 +1374,521 @@ async def train_model(request: TrainingRequest):
                 logger.info("Auto: No real data provided, using synthetic data generation")
                 training_data, testing_data, feature_columns = generate_synthetic_data()
         
-        # Prepare features and target
-        X_train = training_data[feature_columns]
-        y_train = training_data['Response']
-        X_test = testing_data[feature_columns]
-        y_test = testing_data['Response']
+        model_options = get_model_options(request.modelFamily, request.hyperparameterSearch,
+                                          request.searchCandidates, request.searchTimeBudgetSeconds)
+        return fit_and_evaluate(training_data, testing_data, feature_columns, timings, **model_options)
+        
+    except Exception as e:
+        logger.error(f"Error during model training: {str(e)}")
+        raise
+
+def run_columnar_training_job(training_df, testing_df=None, model_options=None):
+    """Train a model from columnar uploads; runs inside a training worker process"""
+    from sklearn.model_selection import train_test_split
+    timings = {}
+    
+    try:
+        if testing_df is None:
+            training_df, testing_df = train_test_split(training_df, test_size=0.3, random_state=42)
+        
+        training_data, testing_data, feature_columns = process_real_data(training_df, testing_df, timings)
+        return fit_and_evaluate(training_data, testing_data, feature_columns, timings, **(model_options or {}))
+        
+    except Exception as e:
+        logger.error(f"Error during columnar model training: {str(e)}")
+        raise
+
+def read_columnar_upload(data, fmt, columns=None):
+    """Turn an uploaded columnar payload into a DataFrame, without copying where possible.
+    
+    fmt is "arrow" (IPC file or stream), "parquet" or "raw". Raw payloads are
+    little-endian float32 values laid out column after column; columns names them.
+    """
+    import pandas as pd
+    if fmt == "raw":
+        if not columns:
+            raise ValueError("columns is required for raw float32 uploads")
+        names = [name.strip() for name in columns.split(",") if name.strip()]
+        values = np.frombuffer(data, dtype="<f4")
+        if not names or values.size % len(names):
+            raise ValueError(f"Raw upload of {values.size} values does not split into {len(names)} columns")
+        matrix = values.reshape(len(names), -1)
+        return pd.DataFrame({name: matrix[i] for i, name in enumerate(names)}, copy=False)
+    
+    if fmt not in ("arrow", "parquet"):
+        raise ValueError(f"Unsupported columnar format: {fmt}. Use arrow, parquet or raw")
+    
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError(f"pyarrow is required for {fmt} uploads")
+    
+    buffer = pa.py_buffer(data)
+    if fmt == "parquet":
+        table = pq.read_table(pa.BufferReader(buffer))
+    elif data[:6] == b"ARROW1":
+        table = pa.ipc.open_file(buffer).read_all()
+    else:
+        table = pa.ipc.open_stream(buffer).read_all()
+    
+    # Single-chunk numeric columns without nulls come back as views on the upload buffer
+    return pd.DataFrame({name: table.column(name).to_numpy() for name in table.column_names}, copy=False)
+
+def resolve_data_path(data_path):
+    """Resolve a data file path inside DATA_DIR, rejecting anything outside it"""
+    data_dir = os.path.realpath(DATA_DIR)
+    path = os.path.realpath(os.path.join(data_dir, data_path))
+    if os.path.commonpath([data_dir, path]) != data_dir:
+        raise ValueError("dataPath must be inside the data directory")
+    if not os.path.isfile(path):
+        raise ValueError(f"Data file not found: {data_path}")
+    if not path.lower().endswith((".csv", ".parquet")):
+        raise ValueError("dataPath must be a .csv or .parquet file")
+    return path
+
+def iter_data_chunks(path, chunk_size):
+    """Yield a CSV or Parquet file as DataFrames of at most chunk_size rows"""
+    import pandas as pd
+    if path.lower().endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("pyarrow is required to read Parquet files")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+def iter_period_chunks(path, request, period):
+    """Stream the rows of one date range as (features, response) chunks"""
+    import pandas as pd
+    start = pd.Timestamp(period.start).tz_localize(None)
+    end = pd.Timestamp(period.end).tz_localize(None)
+    
+    for chunk in iter_data_chunks(path, request["chunkSize"]):
+        chunk = standardize_column_names(chunk)
+        timestamp_col = request["timestampColumn"] or next(
+            (col for col in chunk.columns if col.lower() in TIMESTAMP_COLUMNS), None)
+        if timestamp_col not in chunk.columns:
+            raise ValueError("A timestamp column is required for chunked training")
+        if 'Response' not in chunk.columns:
+            raise ValueError("Response column is required for training")
+        
+        timestamps = pd.to_datetime(chunk[timestamp_col], errors='coerce')
+        if timestamps.dt.tz is not None:
+            timestamps = timestamps.dt.tz_localize(None)
+        chunk = chunk[((timestamps >= start) & (timestamps <= end)).to_numpy()]
+        if len(chunk):
+            yield chunk
+
+def run_chunked_training_job(request_data):
+    """Train out of core over a local file in row batches; runs inside a training worker process.
+    
+    Peak memory is one chunk plus the model. Three streaming passes:
+    1. per-feature mean/variance over the training range, used for imputation
+       (a streaming median would not have bounded memory) and SGD scaling
+    2. training: SGD partial_fit per chunk, or a forest of trees fitted on
+       per-chunk subsamples, reservoir-sampled down to maxEstimators
+    3. evaluation over the testing range, accumulating a confusion matrix and log loss
+    Learning curves are progressive validation: each chunk is scored before it is trained on.
+    """
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.metrics import accuracy_score, confusion_matrix, log_loss
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    request = ChunkedTrainingRequest(**request_data)
+    options = request.model_dump()
+    timings = {}
+    
+    try:
+        path = resolve_data_path(request.dataPath)
+        logger.info(f"Chunked training ({request.estimator}) from {path} in chunks of {request.chunkSize} rows")
+        
+        # Pass 1: feature columns and streaming statistics
+        feature_columns = None
+        scaler = StandardScaler()
+        training_rows = 0
+        for chunk in iter_period_chunks(path, options, request.trainingPeriod):
+            if feature_columns is None:
+                schema, _ = infer_schema(chunk)
+                feature_columns = schema.feature_columns
+                if not feature_columns:
+                    raise ValueError("At least one numeric feature column is required")
+            scaler.partial_fit(coerce_numeric_matrix(chunk.reindex(columns=feature_columns), feature_columns))
+            training_rows += len(chunk)
         
-        logger.info(f"Training with {len(X_train)} training samples and {len(X_test)} testing samples")
-        logger.info(f"Feature columns: {feature_columns}")
+        if feature_columns is None:
+            raise ValueError("No training records found in the training period")
+        fill_values = np.nan_to_num(scaler.mean_).astype(np.float32)
         
-        # Train Random Forest model
-        model = RandomForestClassifier(n_estimators=100, random_state=42)
+        def prepare(chunk):
+            X = coerce_numeric_matrix(chunk.reindex(columns=feature_columns), feature_columns)
+            X = np.where(np.isnan(X), fill_values, X)
+            y = pd.to_numeric(chunk['Response'], errors='coerce').fillna(0).astype(int).to_numpy()
+            return X, y
         
-        # Simulate training epochs
-        epochs = list(range(1, 11))
+        # Pass 2: incremental training with progressive validation
+        rng = np.random.default_rng(42)
+        reference_rng = np.random.default_rng(43)
+        reference_fraction = min(1.0, DRIFT_REFERENCE_SAMPLE / training_rows)
+        reference_rows = []  # Uniform sample of raw training rows for the drift reference
+        classes = np.array([0, 1])
+        sgd = SGDClassifier(loss="log_loss", random_state=42)
+        forest = None
+        trees = []
+        trees_seen = 0
         training_accuracy = []
         training_loss = []
         
-        for epoch in epochs:
-            # In real implementation, this would be actual training
-            if epoch == 1:
-                model.fit(X_train, y_train)
+        for chunk_index, chunk in enumerate(iter_period_chunks(path, options, request.trainingPeriod)):
+            X, y = prepare(chunk)
+            reference_rows.append(X[reference_rng.random(len(X)) < reference_fraction])
             
-            # Simulate training metrics
-            train_pred = model.predict(X_train)
-            train_acc = accuracy_score(y_train, train_pred)
-            training_accuracy.append(train_acc * 100)
+            if request.estimator == "sgd":
+                X = scaler.transform(X)
+                if chunk_index > 0:
+                    proba = sgd.predict_proba(X)
+                    training_accuracy.append(accuracy_score(y, classes[proba.argmax(axis=1)]) * 100)
+                    training_loss.append(log_loss(y, proba, labels=classes))
+                with track_stage("fit", timings):
+                    sgd.partial_fit(X, y, classes=classes)
+                continue
             
-            # Simulate loss (decreasing over time)
-            loss = 1.0 - (epoch * 0.08)
-            training_loss.append(max(loss, 0.1))
+            if forest is not None:
+                forest.estimators_ = list(trees)
+                proba = forest.predict_proba(X)
+                training_accuracy.append(accuracy_score(y, classes[proba.argmax(axis=1)]) * 100)
+                training_loss.append(log_loss(y, proba, labels=classes))
+            
+            if len(np.unique(y)) < 2:
+                logger.info(f"Skipping chunk {chunk_index} for the forest: only one class present")
+                continue
+            
+            if len(X) > request.maxSamplesPerChunk:
+                sample = rng.choice(len(X), size=request.maxSamplesPerChunk, replace=False)
+                X, y = X[sample], y[sample]
+            
+            chunk_forest = RandomForestClassifier(n_estimators=request.treesPerChunk, random_state=42 + chunk_index)
+            with track_stage("fit", timings):
+                chunk_forest.fit(X, y)
+            if forest is None:
+                forest = chunk_forest
+            
+            # Reservoir sampling keeps a uniform sample of trees across all chunks
+            for tree in chunk_forest.estimators_:
+                trees_seen += 1
+                if len(trees) < request.maxEstimators:
+                    trees.append(tree)
+                else:
+                    slot = rng.integers(trees_seen)
+                    if slot < request.maxEstimators:
+                        trees[slot] = tree
         
-        # Make predictions on test set
-        y_pred = model.predict(X_test)
+        if request.estimator == "sgd":
+            model = make_pipeline(scaler, sgd)
+        else:
+            if forest is None:
+                raise ValueError("Training period needs both Pass and Fail records")
+            forest.estimators_ = trees
+            forest.n_estimators = len(trees)
+            model = forest
         
-        # Calculate metrics
-        accuracy = accuracy_score(y_test, y_pred) * 100
-        precision = precision_score(y_test, y_pred, average='binary') * 100
-        recall = recall_score(y_test, y_pred, average='binary') * 100
-        f1 = f1_score(y_test, y_pred, average='binary') * 100
+        # Pass 3: streaming evaluation over the testing period
+        cm = np.zeros((2, 2), dtype=np.int64)
+        loss_sum = 0.0
+        testing_rows = 0
+        for chunk in iter_period_chunks(path, options, request.testingPeriod):
+            X, y = prepare(chunk)
+            with track_stage("predict", timings):
+                proba = model.predict_proba(X)
+            y_pred = classes[proba.argmax(axis=1)]
+            cm += confusion_matrix(y, y_pred, labels=classes)
+            loss_sum += log_loss(y, proba, labels=classes) * len(y)
+            testing_rows += len(y)
         
-        # Calculate confusion matrix
-        cm = confusion_matrix(y_test, y_pred)
-        confusion_matrix_dict = {
-            "truePositives": int(cm[1, 1]),
-            "trueNegatives": int(cm[0, 0]),
-            "falsePositives": int(cm[0, 1]),
-            "falseNegatives": int(cm[1, 0])
-        }
+        if testing_rows == 0:
+            raise ValueError("No testing records found in the testing period")
         
-        # Store the trained model
-        trained_model = model
+        tn, fp, fn, tp = (int(v) for v in cm.ravel())
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
         
-        logger.info(f"Model training completed. Accuracy: {accuracy:.2f}%")
+        if not training_accuracy:
+            # Single training chunk: the only curve point is the held-out result
+            training_accuracy = [(tp + tn) / testing_rows * 100]
+            training_loss = [loss_sum / testing_rows]
         
-        return TrainingMetrics(
-            accuracy=accuracy,
-            precision=precision,
-            recall=recall,
-            f1Score=f1,
+        metrics = TrainingMetrics(
+            accuracy=(tp + tn) / testing_rows * 100,
+            precision=precision * 100,
+            recall=recall * 100,
+            f1Score=f1 * 100,
             trainingLoss=training_loss,
             trainingAccuracy=training_accuracy,
-            epochs=epochs,
-            confusionMatrix=confusion_matrix_dict
+            epochs=list(range(1, len(training_accuracy) + 1)),
+            confusionMatrix={
+                "truePositives": tp,
+                "trueNegatives": tn,
+                "falsePositives": fp,
+                "falseNegatives": fn
+            }
         )
         
+        logger.info(f"Chunked training completed on {training_rows} training and {testing_rows} testing records. "
+                    f"Accuracy: {metrics.accuracy:.2f}%")
+        
+        drift_reference = build_drift_reference(np.concatenate(reference_rows), feature_columns)
+        return model, feature_columns, metrics.model_dump(exclude={"modelId"}), timings, drift_reference
+        
     except Exception as e:
-        logger.error(f"Error during model training: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Training failed: {str(e)}")
+        logger.error(f"Error during chunked model training: {str(e)}")
+        raise
+
+def build_model(model_family, params, n_jobs=None):
+    """Instantiate an estimator of the given family with the service defaults and params"""
+    from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier, HistGradientBoostingClassifier
+    if model_family == "hist_gradient_boosting":
+        return HistGradientBoostingClassifier(random_state=42, **params)
+    forest_class = ExtraTreesClassifier if model_family == "extra_trees" else RandomForestClassifier
+    return forest_class(n_estimators=100, random_state=42, n_jobs=n_jobs, **params)
+
+def score_candidate(model_family, params, X_fit, y_fit, X_val, y_val):
+    """Validation log loss of one hyperparameter candidate; runs in a joblib worker"""
+    from sklearn.metrics import log_loss
+    model = build_model(model_family, params, n_jobs=1)
+    model.fit(X_fit, y_fit)
+    return log_loss(y_val, model.predict_proba(X_val), labels=model.classes_)
+
+def search_hyperparameters(model_family, X, y, n_candidates, time_budget):
+    """Successive halving over sampled candidates, scored on a validation split of the training rows.
+    
+    Each round fits the surviving candidates in parallel on SEARCH_HALVING_FACTOR times
+    more rows than the last and keeps the best 1/SEARCH_HALVING_FACTOR of them. A round
+    is only started if, judging by the previous one, it fits in the time budget, and
+    within a round the budget is checked between batches of parallel fits, so the
+    search ends with the best candidate scored so far once it runs out. The first
+    round's rows are sized from the budget too, since one batch cannot be cut short.
+    """
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import train_test_split, ParameterSampler
+    deadline = time.monotonic() + time_budget
+    stratify = y if np.unique(y, return_counts=True)[1].min() >= 2 else None
+    X_fit, X_val, y_fit, y_val = train_test_split(X, y, test_size=0.25, random_state=42, stratify=stratify)
+    
+    candidates = list(ParameterSampler(HYPERPARAMETER_SPACES[model_family], n_iter=n_candidates, random_state=42))
+    rounds = max(1, math.ceil(math.log(len(candidates), SEARCH_HALVING_FACTOR))) if len(candidates) > 1 else 1
+    n_samples = max(SEARCH_MIN_SAMPLES, len(X_fit) // SEARCH_HALVING_FACTOR ** (rounds - 1))
+    order = np.random.default_rng(42).permutation(len(X_fit))  # Each round's rows extend the previous round's
+    batches = math.ceil(len(candidates) / TRAINING_N_JOBS)
+    n_samples = first_round_rows(model_family, candidates[0], X_fit[order], y_fit[order], X_val, y_val, n_samples,
+                                 time_budget / rounds / batches)
+    round_seconds = 0.0
+    
+    with Parallel(n_jobs=TRAINING_N_JOBS) as parallel:
+        for round_index in range(rounds):
+            if round_index > 0 and time.monotonic() + round_seconds > deadline:
+                logger.info(f"Hyperparameter search stopped before round {round_index + 1}/{rounds}: time budget reached")
+                break
+            
+            round_start = time.monotonic()
+            rows = order[:n_samples]
+            if len(np.unique(y_fit[rows])) < 2:
+                rows = order  # Too few rows to see both classes
+            X_round, y_round = X_fit[rows], y_fit[rows]
+            
+            losses = []
+            batch_seconds = 0.0
+            for batch_start in range(0, len(candidates), TRAINING_N_JOBS):
+                # The first batch always runs, so every round that starts scores a candidate
+                if losses and time.monotonic() + batch_seconds > deadline:
+                    break
+                batch_begin = time.monotonic()
+                losses.extend(parallel(
+                    delayed(score_candidate)(model_family, params, X_round, y_round, X_val, y_val)
+                    for params in candidates[batch_start:batch_start + TRAINING_N_JOBS]
+                ))
+                batch_seconds = time.monotonic() - batch_begin
+            
+            cut_short = len(losses) < len(candidates)
+            ranking = np.argsort(losses, kind="stable")
+            keep = 1 if cut_short else max(1, math.ceil(len(candidates) / SEARCH_HALVING_FACTOR))
+            candidates = [candidates[i] for i in ranking[:keep]]
+            round_seconds = time.monotonic() - round_start
+            
+            logger.info(f"Search round {round_index + 1}/{rounds}: {len(losses)} candidates on {len(rows)} rows in "
+                        f"{round_seconds:.1f}s, best validation log loss {losses[ranking[0]]:.4f}")
+            if cut_short:
+                logger.info(f"Hyperparameter search stopped during round {round_index + 1}/{rounds}: time budget reached")
+                break
+            n_samples *= SEARCH_HALVING_FACTOR
+    
+    return candidates[0]
+
+def first_round_rows(model_family, params, X_fit, y_fit, X_val, y_val, n_samples, seconds_per_candidate):
+    """Rows per candidate for the first search round, so one fit takes about seconds_per_candidate.
+    
+    Times one candidate on SEARCH_MIN_SAMPLES and on SEARCH_HALVING_FACTOR times as many
+    rows, and extrapolates as a fixed cost plus a cost per row; never more than n_samples.
+    """
+    small, large = SEARCH_MIN_SAMPLES, SEARCH_MIN_SAMPLES * SEARCH_HALVING_FACTOR
+    if n_samples <= large or len(np.unique(y_fit[:small])) < 2:
+        return n_samples
+    
+    seconds = []
+    for rows in (small, large):
+        start = time.monotonic()
+        score_candidate(model_family, params, X_fit[:rows], y_fit[:rows], X_val, y_val)
+        seconds.append(time.monotonic() - start)
+    per_row = (seconds[1] - seconds[0]) / (large - small)
+    if per_row <= 0:
+        return n_samples
+    return int(min(n_samples, max(small, small + (seconds_per_candidate - seconds[0]) / per_row)))
+
+def fit_forest_stages(model, X_train, y_train, X_test, y_test, timings):
+    """Grow a forest in stages with warm_start, scoring the held-out set after each stage.
+    
+    Each stage only fits and scores the trees it adds, so the learning curve costs
+    one fit plus one pass over the test set in total.
+    """
+    from sklearn.metrics import accuracy_score, log_loss
+    n_estimators = model.n_estimators
+    model.set_params(warm_start=True)
+    training_accuracy = []
+    training_loss = []
+    proba_sum = None
+    
+    for epoch in range(1, TRAINING_STAGES + 1):
+        fitted_trees = len(getattr(model, 'estimators_', []))
+        model.n_estimators = n_estimators * epoch // TRAINING_STAGES
+        with track_stage("fit", timings):
+            model.fit(X_train, y_train)
+        
+        with track_stage("predict", timings):
+            if proba_sum is None:
+                proba_sum = np.zeros((len(X_test), len(model.classes_)))
+            for tree in model.estimators_[fitted_trees:]:
+                proba_sum += tree.predict_proba(X_test)
+        
+        with track_stage("metrics", timings):
+            # Same accumulation as the forest's predict_proba
+            test_proba = proba_sum / len(model.estimators_)
+            training_accuracy.append(accuracy_score(y_test, model.classes_[test_proba.argmax(axis=1)]) * 100)
+            training_loss.append(log_loss(y_test, test_proba, labels=model.classes_))
+    
+    # Fit in parallel, but predict on one thread: served rows are few, and threaded
+    # accumulation would make the probabilities depend on tree completion order
+    model.set_params(warm_start=False, n_jobs=None)
+    return test_proba, training_accuracy, training_loss
+
+def fit_boosting_stages(model, X_train, y_train, X_test, y_test, timings):
+    """Fit gradient boosting once and read its learning curve off staged_predict_proba"""
+    from sklearn.metrics import accuracy_score, log_loss
+    with track_stage("fit", timings):
+        model.fit(X_train, y_train)
+    
+    # Early stopping can leave fewer iterations than stages, in which case stages repeat
+    stages = [max(1, model.n_iter_ * epoch // TRAINING_STAGES) for epoch in range(1, TRAINING_STAGES + 1)]
+    stage_scores = {}
+    with track_stage("predict", timings):
+        for iteration, test_proba in enumerate(model.staged_predict_proba(X_test), start=1):
+            if iteration in stages:
+                stage_scores[iteration] = (
+                    accuracy_score(y_test, model.classes_[test_proba.argmax(axis=1)]) * 100,
+                    log_loss(y_test, test_proba, labels=model.classes_)
+                )
+    
+    training_accuracy = [stage_scores[stage][0] for stage in stages]
+    training_loss = [stage_scores[stage][1] for stage in stages]
+    return test_proba, training_accuracy, training_loss
+
+def fit_and_evaluate(training_data, testing_data, feature_columns, timings, model_family="random_forest",
+                     search_candidates=0, search_time_budget=60.0):
+    """Fit a model on prepared data and compute learning curves and test metrics"""
+    from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
+    # Prepare features and target
+    X_train = training_data[feature_columns].to_numpy(dtype=np.float32)
+    y_train = training_data['Response'].to_numpy()
+    X_test = testing_data[feature_columns].to_numpy(dtype=np.float32)
+    y_test = testing_data['Response'].to_numpy()
+    
+    logger.info(f"Training {model_family} with {len(X_train)} training samples and {len(X_test)} testing samples")
+    logger.info(f"Feature columns: {feature_columns}")
+    
+    params = {}
+    if search_candidates:
+        with track_stage("search", timings):
+            params = search_hyperparameters(model_family, X_train, y_train, search_candidates, search_time_budget)
+        logger.info(f"Hyperparameter search picked {params}")
+    
+    model = build_model(model_family, params, n_jobs=TRAINING_N_JOBS)
+    fit_stages = fit_boosting_stages if model_family == "hist_gradient_boosting" else fit_forest_stages
+    test_proba, training_accuracy, training_loss = fit_stages(model, X_train, y_train, X_test, y_test, timings)
+    epochs = list(range(1, TRAINING_STAGES + 1))
+    
+    # Predictions on the test set from the final model
+    y_pred = model.classes_[test_proba.argmax(axis=1)]
+    
+    with track_stage("metrics", timings):
+        # Calculate metrics
+        accuracy = accuracy_score(y_test, y_pred) * 100
+        precision = precision_score(y_test, y_pred, average='binary') * 100
+        recall = recall_score(y_test, y_pred, average='binary') * 100
+        f1 = f1_score(y_test, y_pred, average='binary') * 100
+        
+        # Calculate confusion matrix
+        cm = confusion_matrix(y_test, y_pred)
+    confusion_matrix_dict = {
+        "truePositives": int(cm[1, 1]),
+        "trueNegatives": int(cm[0, 0]),
+        "falsePositives": int(cm[0, 1]),
+        "falseNegatives": int(cm[1, 0])
+    }
+    
+    metrics = TrainingMetrics(
+        accuracy=accuracy,
+        precision=precision,
+        recall=recall,
+        f1Score=f1,
+        trainingLoss=training_loss,
+        trainingAccuracy=training_accuracy,
+        epochs=epochs,
+        confusionMatrix=confusion_matrix_dict,
+        modelFamily=model_family,
+        hyperparameters=params
+    )
+    
+    logger.info(f"Model training completed. Accuracy: {accuracy:.2f}%")
+    
+    # The parent process registers the model; the swap is atomic so predictions never see a partial model
+    return model, feature_columns, metrics.model_dump(exclude={"modelId"}), timings, build_drift_reference(X_train, feature_columns)
 
 @app.post("/simulation-count")
 async def get_simulation_count(request: SimulationRequest):
-    """Get the total number of records in the simulation period"""
+    """Get the total number of records in the simulation period.
+    
+    Answered from a registered simulation window's precomputed metadata when one
+    is given by sessionId, or when the same client registered a window for exactly
+    this period, so the records need not be sent.
+    """
     try:
+        track_parse_stage()
         logger.info(f"Getting simulation count for period: {request.simulationPeriod.start} to {request.simulationPeriod.end}")
         
+        period = parse_period(request.simulationPeriod)
+        if request.sessionId:
+            session = get_simulation_session(request.sessionId)
+        else:
+            session = find_window_session(request.clientId or "default", period) if period is not None else None
+        
+        if session is not None:
+            stats = session.window_stats(period)
+            logger.info(f"Simulation count from session {session.session_id}: {stats['totalRecords']} records")
+            return SimulationCount(sessionId=session.session_id, **stats)
+        
         # Check if real simulation data is provided
         if hasattr(request, 'simulationData') and request.simulationData and len(request.simulationData) > 0:
             count = len(request.simulationData)
@@ -256,6 +1902,8 @@ async def get_simulation_count(request: SimulationRequest):
         
         return SimulationCount(totalRecords=count)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting simulation count: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get simulation count: {str(e)}")
@@ -263,55 +1911,36 @@ async def get_simulation_count(request: SimulationRequest):
 @app.post("/predict-next")
 async def predict_next(request: SimulationRequest):
     """Get the next prediction for the simulation"""
-    global trained_model, simulation_data, simulation_index
-    
     try:
-        if trained_model is None:
-            raise HTTPException(status_code=400, detail="Model not trained. Please train the model first.")
+        track_parse_stage()
+        entry = get_model_entry(request.modelId)
         
-        logger.info(f"Getting next prediction for simulation period: {request.simulationPeriod.start} to {request.simulationPeriod.end}")
+        logger.debug(f"Getting next prediction for simulation period: {request.simulationPeriod.start} to {request.simulationPeriod.end}")
         
         # Check if real simulation data is provided
         if hasattr(request, 'simulationData') and request.simulationData and len(request.simulationData) > 0:
-            # Use real simulation data
-            if simulation_data is None or len(simulation_data) != len(request.simulationData):
-                # Process and store simulation data
-                simulation_data = pd.DataFrame(request.simulationData)
-                # Standardize column names
-                column_mapping = {}
-                for col in simulation_data.columns:
-                    col_lower = col.lower()
-                    if 'temperature' in col_lower or 'temp' in col_lower:
-                        column_mapping[col] = 'Temperature'
-                    elif 'pressure' in col_lower:
-                        column_mapping[col] = 'Pressure'
-                    elif 'humidity' in col_lower:
-                        column_mapping[col] = 'Humidity'
-                
-                simulation_data = simulation_data.rename(columns=column_mapping)
-                simulation_index = 0  # Reset index
-                logger.info(f"Processed {len(simulation_data)} simulation records")
-            
-            # Get the next record from simulation data
-            if simulation_index >= len(simulation_data):
-                simulation_index = 0  # Wrap around to beginning
-            
-            current_record = simulation_data.iloc[simulation_index]
-            simulation_index += 1
-            
-            # Extract sensor values from the current record
-            temperature = float(current_record.get('Temperature', 25.0))
-            pressure = float(current_record.get('Pressure', 1013.0))
-            humidity = float(current_record.get('Humidity', 50.0))
-            
-            # Get actual timestamp if available
-            timestamp = current_record.get('Timestamp', current_record.get('synthetic_timestamp', datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-            if isinstance(timestamp, str):
-                record_timestamp = timestamp
+            # Each client keeps its own cursor over its own materialized window
+            client_id = request.clientId or "default"
+            session = simulation_sessions.get(client_sessions.get(client_id))
+            if (session is None or len(session) != len(request.simulationData)
+                    or session.model_id != request.modelId or session.feature_columns != entry.feature_columns):
+                # Process and store simulation data, off the event loop so other requests are not held up
+                session = await run_in_threadpool(materialize_simulation_session, request.simulationData,
+                                                  entry.feature_columns, request.modelId, parse_period(request.simulationPeriod))
+                session.client_id = client_id
+                store_simulation_session(session)
+                client_sessions[client_id] = session.session_id
+                logger.info(f"Processed {len(session)} simulation records for client {client_id}")
             else:
-                record_timestamp = str(timestamp)
+                session = get_simulation_session(session.session_id)
+            
+            row = session.advance()
+            temperature, pressure, humidity = session.sensors[row].tolist()
+            features = session.features[row:row + 1]
+            record_timestamp = session.timestamp_strings(row, row + 1)[0]
+            record_drift(entry, session, features)
             
-            logger.info(f"Using real simulation record {simulation_index}/{len(simulation_data)}: T={temperature:.1f}, P={pressure:.1f}, H={humidity:.1f}")
+            logger.debug(f"Using real simulation record {row + 1}/{len(session)}: T={temperature:.1f}, P={pressure:.1f}, H={humidity:.1f}")
             
         else:
             # Fallback to synthetic data generation
@@ -320,62 +1949,824 @@ async def predict_next(request: SimulationRequest):
             pressure = np.random.normal(1013, 10)  # Mean 1013 hPa, std 10 hPa
             humidity = np.random.normal(50, 15)    # Mean 50%, std 15%
             record_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            
+            # Create feature vector
+            readings = {'Temperature': temperature, 'Pressure': pressure, 'Humidity': humidity}
+            features = np.array([[readings.get(col, 0.0) for col in entry.feature_columns]], dtype=np.float32)
+        
+        return make_prediction(entry, features, record_timestamp, temperature, pressure, humidity)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during prediction: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+@app.post("/simulation-sessions")
+async def create_simulation_session(request: SimulationRequest):
+    """Upload a simulation window once and get back a session id for /next calls"""
+    try:
+        track_parse_stage()
+        if not request.simulationData:
+            raise HTTPException(status_code=400, detail="simulationData is required to create a simulation session")
         
-        # Create feature vector
-        features = np.array([[temperature, pressure, humidity]])
+        return await open_simulation_session(request.simulationData, request.modelId, parse_period(request.simulationPeriod),
+                                             request.clientId)
         
-        # Make prediction
-        prediction_proba = trained_model.predict_proba(features)[0]
-        prediction = "Pass" if prediction_proba[1] > 0.5 else "Fail"
-        confidence = max(prediction_proba) * 100
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating simulation session: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to create simulation session: {str(e)}")
+
+@app.post("/simulation-sessions/columnar")
+async def create_simulation_session_columnar(
+    simulationFile: UploadFile = File(...),
+    format: str = Form("arrow"),
+    columns: Optional[str] = Form(None),
+    modelId: Optional[str] = Form(None)
+):
+    """Create a simulation session from an Arrow IPC, Parquet or raw float32 upload"""
+    try:
+        with track_stage("parse"):
+            simulation_df = await run_in_threadpool(read_columnar_upload, await simulationFile.read(), format, columns)
+        return await open_simulation_session(simulation_df, modelId)
         
-        # Generate sample ID
-        sample_id = f"SAMPLE_{uuid.uuid4().hex[:8].upper()}"
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error creating columnar simulation session: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to create simulation session: {str(e)}")
+
+async def open_simulation_session(records, model_id=None, period=None, client_id=None):
+    """Materialize a simulation window (records or DataFrame) in the threadpool and register it as a session"""
+    entry = get_model_entry(model_id)
+    session = await run_in_threadpool(materialize_simulation_session, records, entry.feature_columns, model_id, period)
+    session.client_id = client_id or "default"
+    store_simulation_session(session)
+    
+    client = f" for client {client_id}" if client_id else ""
+    logger.info(f"Created simulation session {session.session_id}{client} with {len(session)} records ({session.nbytes} bytes)")
+    
+    return simulation_session_info(session, entry.model_id)
+
+def simulation_session_info(session, model_id):
+    return SimulationSessionInfo(
+        sessionId=session.session_id,
+        featureColumns=session.feature_columns,
+        ttlSeconds=SIMULATION_SESSION_TTL_SECONDS,
+        modelId=model_id,
+        **session.index.stats()
+    )
+
+@app.get("/simulation-sessions/{session_id}")
+async def get_simulation_session_info(session_id: str):
+    """Count, time range and class balance of a simulation session, without its records"""
+    session = get_simulation_session(session_id)
+    with model_registry_lock:
+        model_id = session.model_id or active_model_id
+    return simulation_session_info(session, model_id)
+
+@app.post("/simulation-sessions/{session_id}/next")
+async def predict_session_next(session_id: str):
+    """Get the next prediction from a previously uploaded simulation window"""
+    try:
+        session = get_simulation_session(session_id)
+        entry = get_session_model_entry(session)
         
-        logger.info(f"Prediction: {prediction} with {confidence:.2f}% confidence for sample {sample_id}")
+        row = session.advance()
+        temperature, pressure, humidity = session.sensors[row].tolist()
+        record_drift(entry, session, session.features[row:row + 1])
         
-        return PredictionResult(
-            timestamp=record_timestamp,
-            sampleId=sample_id,
-            prediction=prediction,
-            confidence=confidence,
-            temperature=temperature,
-            pressure=pressure,
-            humidity=humidity
-        )
+        return make_prediction(entry, session.features[row:row + 1], session.timestamp_strings(row, row + 1)[0],
+                               temperature, pressure, humidity)
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error during prediction: {str(e)}")
+        logger.error(f"Error during session prediction: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
-def process_real_data(training_records, testing_records):
-    """Process real dataset records from the backend"""
+@app.get("/simulation-sessions/{session_id}/drift")
+async def get_simulation_session_drift(session_id: str):
+    """Drift of the rows a session has scored against the training distribution of its model"""
+    session = get_simulation_session(session_id)
+    monitor = session.drift_monitor
+    if monitor is None:
+        monitor = get_drift_monitor(get_session_model_entry(session), session)
+    return await run_in_threadpool(monitor.report, session.session_id)
+
+def get_drift_monitor(entry, session):
+    """The session's drift monitor, started afresh when the session scores with a different model"""
+    with session.lock:
+        monitor = session.drift_monitor
+        if monitor is None or monitor.model_id != entry.model_id:
+            monitor = session.drift_monitor = DriftMonitor(entry.model_id, entry.feature_columns, entry.drift_reference)
+        return monitor
+
+def record_drift(entry, session, rows):
+    """Feed scored feature rows into the session's drift monitor"""
+    get_drift_monitor(entry, session).update(rows)
+
+def build_drift_reference(X, feature_columns):
+    """Training distribution of each feature (moments, range and decile bins) to measure drift against"""
+    reference = []
+    for i, feature in enumerate(feature_columns):
+        values = np.asarray(X[:, i], dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return None
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, DRIFT_BINS + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, values, side="left"), minlength=len(edges) + 1)
+        reference.append({
+            "feature": feature,
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "edges": edges.tolist(),
+            "proportions": (counts / len(values)).tolist()
+        })
+    return reference
+
+def population_stability_index(values, reference):
+    """PSI of observed values against the training proportions of the reference bins"""
+    edges = np.asarray(reference["edges"])
+    observed = np.bincount(np.searchsorted(edges, values, side="left"), minlength=len(edges) + 1) / len(values)
+    observed = np.maximum(observed, PSI_EPSILON)
+    expected = np.maximum(np.asarray(reference["proportions"]), PSI_EPSILON)
+    return float(((observed - expected) * np.log(observed / expected)).sum())
+
+def drift_status(psi):
+    if psi is None:
+        return None
+    return next((status for threshold, status in PSI_THRESHOLDS if psi < threshold), "drift")
+
+@app.delete("/simulation-sessions/{session_id}")
+async def delete_simulation_session(session_id: str):
+    """Release a simulation session before its TTL expires"""
+    if discard_simulation_session(session_id) is None:
+        raise HTTPException(status_code=404, detail=f"Simulation session {session_id} not found")
+    return {"sessionId": session_id, "deleted": True}
+
+@app.post("/predict-batch")
+async def predict_batch(request: BatchPredictionRequest):
+    """Score a range of simulation rows in one vectorized model call"""
+    try:
+        track_parse_stage()
+        entry, session, start, stop = await resolve_batch_rows(request)
+        # Scored and encoded off the event loop, like /predict-stream, so a large batch does not hold up /next ticks
+        response = await run_in_threadpool(build_batch_response, entry, session, start, stop)
+        
+        logger.info(f"Scored batch of {stop - start} records ({start}-{stop})")
+        
+        return response
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during batch prediction: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+@app.post("/predict-stream")
+async def predict_stream(request: BatchPredictionRequest):
+    """Score a range of simulation rows and stream the results as NDJSON, one chunk at a time"""
+    try:
+        entry, session, start, stop = await resolve_batch_rows(request)
+        chunk_size = max(1, request.chunkSize or 5000)
+        
+        def generate():
+            for chunk_start in range(start, stop, chunk_size):
+                chunk = build_prediction_rows(entry, session, chunk_start, min(chunk_start + chunk_size, stop))
+                yield "".join(json.dumps(row) + "\n" for row in chunk)
+        
+        logger.info(f"Streaming predictions for records {start}-{stop} in chunks of {chunk_size}")
+        
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during streaming prediction: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Streaming prediction failed: {str(e)}")
+
+async def resolve_batch_rows(request):
+    """Pick the model, session (existing or ad hoc) and row range a batch request refers to"""
+    if request.sessionId:
+        session = get_simulation_session(request.sessionId)
+        entry = get_session_model_entry(session)
+    elif request.simulationData:
+        entry = get_model_entry(request.modelId)
+        session = await run_in_threadpool(materialize_simulation_session, request.simulationData, entry.feature_columns,
+                                          request.modelId)
+    else:
+        raise HTTPException(status_code=400, detail="Either sessionId or simulationData is required")
+    
+    start = min(max(request.offset or 0, 0), len(session))
+    stop = len(session) if request.limit is None else min(start + max(request.limit, 0), len(session))
+    return entry, session, start, stop
+
+def build_batch_response(entry, session, start, stop, chunk_size=5000):
+    """Score rows [start, stop) and encode the JSON body a chunk of rows at a time.
+    
+    Plain JSON encoding, since validating tens of thousands of PredictionResult objects
+    costs more than scoring; in chunks because json.dumps holds the GIL for the whole
+    call, and one call over a large batch would stall the event loop thread meanwhile.
+    """
+    predictions = build_prediction_rows(entry, session, start, stop)
+    rows = ",".join(json.dumps(predictions[i:i + chunk_size], separators=(",", ":"), allow_nan=False)[1:-1]
+                    for i in range(0, len(predictions), chunk_size))
+    body = f'{{"offset":{start},"count":{len(predictions)},"predictions":[{rows}]}}'
+    return Response(body, media_type="application/json")
+
+def build_prediction_rows(entry, session, start, stop):
+    """Score session rows [start, stop) with a single predict_proba call on the model's engine"""
+    if start >= stop:
+        return []
+    
+    with track_stage("predict"):
+        prediction_proba = entry.predict_proba(session.features[start:stop])
+    count_predictions(stop - start)
+    record_drift(entry, session, session.features[start:stop])
+    passed = prediction_proba[:, 1] > 0.5
+    confidence = prediction_proba.max(axis=1) * 100
+    sensors = session.sensors[start:stop]
+    timestamps = session.timestamp_strings(start, stop)
+    
+    return [
+        {
+            "timestamp": timestamps[i],
+            "sampleId": f"SAMPLE_{uuid.uuid4().hex[:8].upper()}",
+            "prediction": "Pass" if is_pass else "Fail",
+            "confidence": conf,
+            "temperature": temperature,
+            "pressure": pressure,
+            "humidity": humidity
+        }
+        for i, (is_pass, conf, (temperature, pressure, humidity))
+        in enumerate(zip(passed.tolist(), confidence.tolist(), sensors.tolist()))
+    ]
+
+def register_model(model, columns, metrics, activate=True, inference_engine="sklearn", fingerprint=None,
+                   drift_reference=None):
+    """Add a trained model to the registry and optionally make it the active one"""
+    global active_model_id
+    
+    refresh_active_model_id()
+    entry = ModelEntry(f"MODEL_{uuid.uuid4().hex[:12].upper()}", model, list(columns), metrics)
+    entry.fingerprint = fingerprint
+    entry.drift_reference = drift_reference
+    try:
+        entry.set_inference_engine(inference_engine)
+    except ValueError as e:
+        logger.warning(f"Model {entry.model_id} falls back to the sklearn inference engine: {str(e)}")
+    persisted = save_model_entry(entry)
+    
+    with model_registry_lock:
+        model_registry[entry.model_id] = entry
+        activate = activate or active_model_id is None
+        if activate:
+            active_model_id = entry.model_id
+    
+    if activate and persisted:
+        save_active_model_id(entry.model_id)
+    if fingerprint is not None:
+        cache_training_result(fingerprint, entry.model_id)
+    prune_stored_models()
+    return entry
+
+def prune_stored_models():
+    """Delete the oldest models beyond MAX_RETAINED_MODELS from the registry and the model store.
+    
+    The active model, models cached as training results and models that live
+    simulation sessions score with are kept and not counted.
+    """
+    with training_cache_lock:
+        kept = set(training_result_cache.values())
+    with model_registry_lock:
+        kept.add(active_model_id)
+        created = {model_id: entry.created_at for model_id, entry in model_registry.items()}
+    kept.update(session.model_id for session in list(simulation_sessions.values()))
+    
+    stored_ids = os.listdir(MODEL_STORE_DIR) if os.path.isdir(MODEL_STORE_DIR) else []
+    for model_id in stored_ids:
+        if model_id not in created and model_id not in kept:
+            try:
+                with open(os.path.join(MODEL_STORE_DIR, model_id, "meta.json")) as f:
+                    created[model_id] = json.load(f).get("createdAt") or ""
+            except (OSError, ValueError):
+                pass  # Not a model directory, or being written or deleted by another worker
+    
+    candidates = sorted((created_at, model_id) for model_id, created_at in created.items() if model_id not in kept)
+    for _, model_id in candidates[:max(0, len(candidates) - MAX_RETAINED_MODELS)]:
+        with model_registry_lock:
+            model_registry.pop(model_id, None)
+        shutil.rmtree(os.path.join(MODEL_STORE_DIR, model_id), ignore_errors=True)
+        logger.info(f"Deleted model {model_id} beyond the retention limit of {MAX_RETAINED_MODELS} models")
+
+def set_active_model(entry):
+    """Make a registered model the default for predictions, now and after a restart"""
+    global active_model_id
+    
+    with model_registry_lock:
+        active_model_id = entry.model_id
+    save_active_model_id(entry.model_id)
+
+def save_model_entry(entry):
+    """Write a model and its metadata to the model store; returns False if the store is unavailable"""
+    import joblib
+    model_dir = os.path.join(MODEL_STORE_DIR, entry.model_id)
+    try:
+        os.makedirs(model_dir, exist_ok=True)
+        joblib.dump(entry.model, os.path.join(model_dir, "model.joblib"))
+        forest_dir = os.path.join(model_dir, "forest")
+        if entry.compiled is None and not os.path.isdir(forest_dir):
+            # Node arrays for prediction-only workers, whichever engine this one uses
+            try:
+                CompiledForest.from_forest(entry.model).save(forest_dir)
+            except ValueError:
+                pass  # Not a forest: prediction-only workers load the estimator instead
+    except OSError as e:
+        logger.warning(f"Could not persist model {entry.model_id} to {MODEL_STORE_DIR}: {str(e)}")
+        return False
+    return save_model_metadata(entry)
+
+def save_model_metadata(entry):
+    """Write a stored model's metadata and, for the compiled engine, its node arrays"""
+    model_dir = os.path.join(MODEL_STORE_DIR, entry.model_id)
+    try:
+        forest_dir = os.path.join(model_dir, "forest")
+        # A stored model never changes, and rewriting the files would unshare workers' pages
+        if entry.compiled is not None and not os.path.isdir(forest_dir):
+            entry.compiled.save(forest_dir)
+        meta = {
+            "modelId": entry.model_id,
+            "featureColumns": entry.feature_columns,
+            "metrics": entry.metrics,
+            "createdAt": entry.created_at,
+            "inferenceEngine": entry.inference_engine,
+            "fingerprint": entry.fingerprint,
+            "driftReference": entry.drift_reference
+        }
+        with open(os.path.join(model_dir, "meta.json.tmp"), "w") as f:
+            json.dump(meta, f)
+        os.replace(os.path.join(model_dir, "meta.json.tmp"), os.path.join(model_dir, "meta.json"))
+        entry.meta_mtime = os.stat(os.path.join(model_dir, "meta.json")).st_mtime_ns
+        return True
+    except OSError as e:
+        logger.warning(f"Could not persist model {entry.model_id} to {MODEL_STORE_DIR}: {str(e)}")
+        return False
+
+def load_stored_model(model_id, eager=False):
+    """Load a persisted model, memory-mapping its forest node arrays when it is served compiled.
+    
+    The sklearn estimator is unpickled now only if eager (or needed to compile the
+    forest); otherwise on first use, through ModelEntry.model_path.
+    """
+    model_dir = os.path.join(MODEL_STORE_DIR, os.path.basename(model_id))
+    meta_mtime = os.stat(os.path.join(model_dir, "meta.json")).st_mtime_ns  # Before reading, so a newer write is seen next time
+    with open(os.path.join(model_dir, "meta.json")) as f:
+        meta = json.load(f)
+    forest_dir = os.path.join(model_dir, "forest")
+    model_path = os.path.join(model_dir, "model.joblib")
+    use_compiled = meta.get("inferenceEngine") == "compiled" or SERVICE_ROLE == "predict"
+    compiled = CompiledForest.load(forest_dir) if use_compiled and os.path.isdir(forest_dir) else None
+    
+    if compiled is not None:
+        # Scored from the shared node arrays; "all" workers unpickle the estimator only if they
+        # need it, prediction-only workers never do, so they import neither sklearn nor joblib
+        model = None
+        if SERVICE_ROLE == "predict":
+            model_path = None
+    elif eager or meta.get("inferenceEngine") == "compiled":
+        import joblib
+        model = joblib.load(model_path)
+    else:
+        model = None
+    entry = ModelEntry(meta["modelId"], model, meta["featureColumns"], meta["metrics"], meta.get("createdAt"), model_path)
+    entry.fingerprint = meta.get("fingerprint")
+    entry.drift_reference = meta.get("driftReference")
+    entry.meta_mtime = meta_mtime
+    
+    if use_compiled and (compiled is not None or model is not None):
+        try:
+            entry.set_inference_engine("compiled", compiled)
+        except ValueError:
+            if meta.get("inferenceEngine") == "compiled":
+                raise
+    return entry
+
+def save_active_model_id(model_id):
+    """Record which model is active, for the other workers and the next startup"""
+    global active_model_mtime
+    
+    path = os.path.join(MODEL_STORE_DIR, "active.json")
+    try:
+        os.makedirs(MODEL_STORE_DIR, exist_ok=True)
+        with open(path + ".tmp", "w") as f:
+            json.dump({"modelId": model_id}, f)
+        os.replace(path + ".tmp", path)
+        with model_registry_lock:
+            active_model_mtime = os.stat(path).st_mtime_ns
+    except OSError as e:
+        logger.warning(f"Could not record active model in {MODEL_STORE_DIR}: {str(e)}")
+
+def refresh_active_model_id():
+    """Follow activations made by other workers: re-read active.json when its mtime changed"""
+    global active_model_id, active_model_mtime
+    
+    path = os.path.join(MODEL_STORE_DIR, "active.json")
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        if mtime == active_model_mtime:
+            return
+        with open(path) as f:
+            stored_active_id = json.load(f).get("modelId")
+    except (OSError, ValueError):
+        return
+    
+    with model_registry_lock:
+        active_model_id = stored_active_id
+        active_model_mtime = mtime
+
+def sync_stored_model(model_id, entry):
+    """Bring one registry entry in line with the model store; returns None if the model is gone.
+    
+    A model stored after this worker last looked is loaded, one whose meta.json was
+    removed is dropped, and one whose meta.json changed (an inference engine switch)
+    is reloaded. Entries this worker could not persist are left as they are.
+    """
+    try:
+        mtime = os.stat(os.path.join(MODEL_STORE_DIR, os.path.basename(model_id), "meta.json")).st_mtime_ns
+        if entry is not None and entry.meta_mtime == mtime:
+            return entry
+        if entry is None or entry.meta_mtime is not None:
+            stored = load_stored_model(model_id)
+            with model_registry_lock:
+                model_registry[stored.model_id] = stored
+            return stored
+        return entry
+    except OSError:
+        if entry is not None and entry.meta_mtime is not None:
+            # Deleted by another worker
+            with model_registry_lock:
+                if model_registry.get(entry.model_id) is entry:
+                    del model_registry[entry.model_id]
+            return None
+        return entry
+
+def sync_model_store():
+    """Bring the whole registry and the active model id in line with the model store"""
+    refresh_active_model_id()
+    stored_ids = set(os.listdir(MODEL_STORE_DIR)) if os.path.isdir(MODEL_STORE_DIR) else set()
+    for model_id in sorted(stored_ids | set(model_registry)):
+        if model_id in model_registry or os.path.isfile(os.path.join(MODEL_STORE_DIR, model_id, "meta.json")):
+            try:
+                sync_stored_model(model_id, model_registry.get(model_id))
+            except Exception as e:
+                logger.warning(f"Skipping stored model {model_id}: {str(e)}")
+
+def get_model_entry(model_id=None):
+    """Resolve a model id (or the active model) to its registry entry, in step with the model store"""
+    if not model_id:
+        refresh_active_model_id()
+    with model_registry_lock:
+        model_id = model_id or active_model_id
+        entry = model_registry.get(model_id) if model_id else None
+    
+    if model_id:
+        entry = sync_stored_model(model_id, entry)
+    
+    if entry is None:
+        if model_id:
+            raise HTTPException(status_code=404, detail=f"Model {model_id} not found")
+        raise HTTPException(status_code=400, detail="Model not trained. Please train the model first.")
+    return entry
+
+def get_session_model_entry(session):
+    """Resolve the model a session scores with and check its features still line up"""
+    entry = get_model_entry(session.model_id)
+    if session.feature_columns != entry.feature_columns:
+        raise HTTPException(status_code=409, detail="Model features changed since the session was created. Please create a new session.")
+    return entry
+
+def get_simulation_session(session_id):
+    """Look up a live session and mark it as recently used"""
+    evict_simulation_sessions()
+    session = simulation_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Simulation session {session_id} not found or expired")
+    session.last_access = time.monotonic()
+    simulation_sessions.move_to_end(session_id)
+    return session
+
+def evict_simulation_sessions(reserve_bytes=0):
+    """Drop expired sessions, then least recently used ones until the memory cap fits"""
+    now = time.monotonic()
+    for session_id in [sid for sid, session in simulation_sessions.items() if session.is_expired(now)]:
+        logger.info(f"Evicting expired simulation session {session_id}")
+        discard_simulation_session(session_id)
+    
+    used_bytes = sum(session.nbytes for session in simulation_sessions.values())
+    while simulation_sessions and used_bytes + reserve_bytes > SIMULATION_SESSION_MAX_BYTES:
+        session_id = next(iter(simulation_sessions))
+        session = discard_simulation_session(session_id)
+        if session is not None:
+            used_bytes -= session.nbytes
+        logger.info(f"Evicting simulation session {session_id} to stay under the memory cap")
+
+def discard_simulation_session(session_id):
+    """Remove a session and the period window and client cursor entries pointing at it; None if it was not live"""
+    session = simulation_sessions.pop(session_id, None)
+    if session is not None:
+        window = (session.client_id, session.period)
+        if simulation_windows.get(window) == session_id:
+            del simulation_windows[window]
+        if client_sessions.get(session.client_id) == session_id:
+            del client_sessions[session.client_id]
+    return session
+
+def store_simulation_session(session):
+    """Make room for a session and register it, under its client's simulation period too"""
+    if session.nbytes > SIMULATION_SESSION_MAX_BYTES:
+        # Rejected before eviction, which would otherwise drop every other session to make room
+        raise HTTPException(status_code=413, detail="Simulation window exceeds the session memory cap")
+    evict_simulation_sessions(reserve_bytes=session.nbytes)
+    simulation_sessions[session.session_id] = session
+    if session.period is not None:
+        simulation_windows[(session.client_id, session.period)] = session.session_id
+
+def find_window_session(client_id, period):
+    """The live session this client most recently registered for exactly this simulation period, if any"""
+    evict_simulation_sessions()  # An expired window falls through to the records rather than a 404
+    session = simulation_sessions.get(simulation_windows.get((client_id, period)))
+    if session is None:
+        return None
+    return get_simulation_session(session.session_id)
+
+def parse_period(period):
+    """A DateRange as (start, end) timezone-naive nanoseconds, the key simulation windows are indexed by; None if unparseable"""
+    times = parse_timestamps([period.start, period.end])
+    if np.isnat(times).any():
+        return None
+    start, end = times.astype(np.int64).tolist()
+    return start, end
+
+def parse_timestamps(values):
+    """Timestamps as timezone-naive datetime64[ns], NaT where unparseable, without pandas.
+    
+    ISO 8601 strings (T or space separated) convert in one vectorized pass; other
+    values, including strings with a timezone offset, are parsed one by one with
+    the offset dropped, keeping the wall time as tz_localize(None) does.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind == "M":
+        return values.astype("datetime64[ns]")
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")  # numpy converts timezone offsets to UTC with only a warning
+            return values.astype("datetime64[ns]")
+    except (ValueError, TypeError, Warning):
+        return np.array([parse_timestamp(value) for value in values.tolist()], dtype="datetime64[ns]")
+
+def parse_timestamp(value):
+    if isinstance(value, datetime):
+        value = value.replace(tzinfo=None).isoformat()
+    text = TIMEZONE_SUFFIX.sub("", str(value).strip()) if value is not None else ""
+    try:
+        return np.datetime64(text, "ns")
+    except ValueError:
+        return np.datetime64("NaT", "ns")
+
+def unparsed_timestamps(values, times):
+    """Non-empty values that parsed to NaT (e.g. "08/01/2025 08:12:45"), as strings in an object
+    array with None elsewhere, so responses can show them as sent; None if every value parsed"""
+    rows = np.flatnonzero(np.isnat(times))
+    if len(rows) == 0:
+        return None
+    
+    values = np.asarray(values, dtype=object)
+    raw = np.full(len(times), None, dtype=object)
+    for row in rows.tolist():
+        value = values[row]
+        text = str(value).strip() if value is not None else ""
+        if text not in ("", "None", "nan", "NaN", "NaT"):
+            raw[row] = text
+    return raw if any(text is not None for text in raw[rows].tolist()) else None
+
+def format_timestamps(values, missing=None):
+    """datetime64 values as "YYYY-MM-DD HH:MM:SS" strings, with missing in place of NaT"""
+    text = np.datetime_as_string(np.asarray(values, dtype="datetime64[ns]").astype("datetime64[s]"), unit="s")
+    return [missing if value == "NaT" else value.replace("T", " ") for value in text.tolist()]
+
+def format_timestamp_ns(value):
+    return format_timestamps(np.array([int(value)]).astype("datetime64[ns]"))[0]
+
+def materialize_simulation_session(records, columns, model_id=None, period=None):
+    """Cast a simulation window (records or a DataFrame) to the model's feature matrix once, up front.
+    
+    Works column by column with NumPy rather than through a DataFrame, so
+    prediction-only workers serve simulation windows without importing pandas.
+    """
+    with track_stage("dataframe"):
+        names, read_column = record_columns(records)
+    with track_stage("schema"):
+        column_mapping = map_column_roles(names)
+        sources = {}  # standardized name -> raw name, the first one if several map to a role
+        for name in names:
+            sources.setdefault(column_mapping.get(name, name), name)
+    n_records = len(records)
+    
+    def numeric_matrix(cols, dtype):
+        matrix = np.empty((n_records, len(cols)), dtype=dtype)
+        for i, col in enumerate(cols):
+            if col not in sources:
+                matrix[:, i] = SENSOR_DEFAULTS.get(col, 0.0)
+                continue
+            column = coerce_numeric_column(read_column(sources[col]))
+            fill_value = SENSOR_DEFAULTS.get(col)
+            if fill_value is None:
+                fill_value = np.nanmedian(column) if not np.isnan(column).all() else 0.0
+            matrix[:, i] = np.where(np.isnan(column), fill_value, column)
+        return matrix
+    
+    features = numeric_matrix(columns, np.float32)
+    sensors = numeric_matrix(SENSOR_COLUMNS, np.float64)
+    
+    timestamp_col = next((col for col in ('Timestamp', 'timestamp', 'synthetic_timestamp') if col in sources), None)
+    raw_times = None
+    if timestamp_col is not None:
+        values = read_column(sources[timestamp_col])
+        record_times = parse_timestamps(values)
+        raw_times = unparsed_timestamps(values, record_times)
+    else:
+        record_times = np.full(n_records, np.datetime64('NaT'), dtype='datetime64[ns]')
+    
+    if 'Response' in sources:
+        response = coerce_numeric_column(read_column(sources['Response']))
+    else:
+        response = np.full(n_records, np.nan)
+    index = SimulationWindowIndex(record_times, response)
+    
+    return SimulationSession(f"SIM_{uuid.uuid4().hex}", features, sensors, record_times, list(columns), model_id, index, period,
+                             raw_times)
+
+def record_columns(records):
+    """Column names of records (a list of dicts or a DataFrame) and a function reading one column"""
+    if hasattr(records, "columns"):
+        return list(records.columns), lambda name: records[name].to_numpy()
+    names = dict.fromkeys(records[0]) if records else {}
+    names.update(dict.fromkeys(sorted(set().union(*records) - names.keys())))  # Keys missing from the first record
+    return list(names), lambda name: [record.get(name) for record in records]
+
+def coerce_numeric_column(values):
+    """One column as float64, with blank and non-numeric values becoming NaN, without pandas"""
+    values = np.asarray(values)
+    try:
+        return values.astype(np.float64)
+    except (ValueError, TypeError):
+        pass
+    
+    # Values as sent by the backend are strings, with blanks for missing readings
+    text = values.astype(str)
+    text[np.isin(np.char.strip(text), ("", "None"))] = "nan"
+    try:
+        return text.astype(np.float64)
+    except ValueError:
+        return np.array([to_float(value) for value in values.tolist()], dtype=np.float64)
+
+def to_float(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
+
+def map_column_roles(columns):
+    """Map column name variations to Response/Temperature/Pressure/Humidity"""
+    column_mapping = {}
+    for col in columns:
+        col_lower = col.lower()
+        if 'response' in col_lower:
+            column_mapping[col] = 'Response'
+        elif 'temperature' in col_lower or 'temp' in col_lower:
+            column_mapping[col] = 'Temperature'
+        elif 'pressure' in col_lower:
+            column_mapping[col] = 'Pressure'
+        elif 'humidity' in col_lower:
+            column_mapping[col] = 'Humidity'
+        # Keep timestamp columns as-is
+    
+    return column_mapping
+
+def standardize_column_names(df):
+    """Rename columns to their standardized roles (case-insensitive substring match)"""
+    return df.rename(columns=map_column_roles(df.columns))
+
+def coerce_numeric_matrix(df, columns):
+    """Cast columns to one float32 matrix, with non-numeric values becoming NaN.
+    
+    Clean data (including numeric strings from JSON) converts in a single
+    vectorized pass; only dirty data falls back to per-column pd.to_numeric.
+    """
+    import pandas as pd
+    if not columns:
+        return np.empty((len(df), 0), dtype=np.float32)
+    try:
+        return df[columns].to_numpy(dtype=np.float32)
+    except (ValueError, TypeError):
+        return df[columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float32)
+
+def dataset_fingerprint(df):
+    """Fingerprint a dataset layout by its column names and dtypes"""
+    layout = "|".join(f"{col}:{dtype}" for col, dtype in df.dtypes.items())
+    return hashlib.sha1(layout.encode("utf-8")).hexdigest()
+
+def observed_columns(matrix):
+    """Mask of matrix columns holding at least one non-NaN value"""
+    return ~np.isnan(matrix).all(axis=0) if len(matrix) else np.zeros(matrix.shape[1], dtype=bool)
+
+def infer_schema(df):
+    """Decide column roles and numeric feature columns once per dataset fingerprint.
+    
+    Returns the schema and df's feature columns as a float32 matrix; the matrix
+    comes from the same coercion pass used for inference or for checking the
+    cached schema.
+    
+    The fingerprint only covers the layout, and records sent as strings (as the
+    backend's CSV reader produces them) share one dtype whatever their content,
+    so a cached schema is only reused while this data agrees with its numeric
+    decisions: every feature column has values and every excluded one has none.
+    """
+    fingerprint = dataset_fingerprint(df)
+    schema = schema_cache.get(fingerprint)
+    if schema is not None:
+        renamed = df.rename(columns=schema.column_mapping)
+        matrix = coerce_numeric_matrix(renamed, schema.feature_columns)
+        excluded = coerce_numeric_matrix(renamed, schema.excluded_columns)
+        if observed_columns(matrix).all() and not observed_columns(excluded).any():
+            schema_cache.move_to_end(fingerprint)
+            return schema, matrix
+    
+    column_mapping = map_column_roles(df.columns)
+    renamed = df.rename(columns=column_mapping)
+    
+    # Identify feature columns (exclude response and timestamp columns)
+    candidates = [col for col in renamed.columns if col != 'Response' and col.lower() not in TIMESTAMP_COLUMNS]
+    
+    # Keep columns with at least some numeric values
+    matrix = coerce_numeric_matrix(renamed, candidates)
+    numeric_mask = observed_columns(matrix)
+    feature_columns = [col for col, numeric in zip(candidates, numeric_mask) if numeric]
+    
+    skipped = [col for col, numeric in zip(candidates, numeric_mask) if not numeric]
+    if skipped:
+        logger.info(f"Skipping non-numeric columns: {skipped}")
+    
+    schema = DatasetSchema(fingerprint, column_mapping, feature_columns, skipped)
+    schema_cache[fingerprint] = schema
+    while len(schema_cache) > SCHEMA_CACHE_SIZE:
+        schema_cache.popitem(last=False)
+    return schema, matrix[:, numeric_mask]
+
+def make_prediction(entry, features, record_timestamp, temperature, pressure, humidity):
+    """Score one feature row with a registered model and build the response"""
+    with track_stage("predict"):
+        prediction_proba = entry.predict_proba(features)[0]
+    prediction = "Pass" if prediction_proba[1] > 0.5 else "Fail"
+    confidence = max(prediction_proba) * 100
+    
+    # Generate sample ID
+    sample_id = f"SAMPLE_{uuid.uuid4().hex[:8].upper()}"
+    
+    logger.debug(f"Prediction: {prediction} with {confidence:.2f}% confidence for sample {sample_id}")
+    count_predictions(1)
+    
+    return PredictionResult(
+        timestamp=record_timestamp,
+        sampleId=sample_id,
+        prediction=prediction,
+        confidence=confidence,
+        temperature=temperature,
+        pressure=pressure,
+        humidity=humidity
+    )
+
+def process_real_data(training_records, testing_records, timings=None):
+    """Process real dataset records (lists of dicts or DataFrames) from the backend"""
+    import pandas as pd
     logger.info("Processing real dataset records")
     
-    # Convert list of dicts to DataFrames
-    training_df = pd.DataFrame(training_records)
-    testing_df = pd.DataFrame(testing_records)
-    
-    # Standardize column names (handle case-insensitive matching)
-    def standardize_column_names(df):
-        # Create a mapping for common variations
-        column_mapping = {}
-        for col in df.columns:
-            col_lower = col.lower()
-            if 'response' in col_lower:
-                column_mapping[col] = 'Response'
-            elif 'temperature' in col_lower or 'temp' in col_lower:
-                column_mapping[col] = 'Temperature'
-            elif 'pressure' in col_lower:
-                column_mapping[col] = 'Pressure'
-            elif 'humidity' in col_lower:
-                column_mapping[col] = 'Humidity'
-            # Keep timestamp columns as-is for now
-        
-        return df.rename(columns=column_mapping)
-    
-    training_df = standardize_column_names(training_df)
-    testing_df = standardize_column_names(testing_df)
+    # Convert list of dicts to DataFrames; DataFrames from columnar uploads pass through
+    with track_stage("dataframe", timings):
+        training_df = pd.DataFrame(training_records)
+        testing_df = pd.DataFrame(testing_records)
+    
+    with track_stage("schema", timings):
+        schema, X_train = infer_schema(training_df)
+        training_df = training_df.rename(columns=schema.column_mapping)
+        testing_df = standardize_column_names(testing_df)
     
     logger.info(f"Training data columns: {list(training_df.columns)}")
     logger.info(f"Testing data columns: {list(testing_df.columns)}")
@@ -385,79 +2776,224 @@ def process_real_data(training_records, testing_records):
         logger.error("Response column not found in training data")
         raise ValueError("Response column is required for training")
     
-    # Convert Response to binary if needed
-    training_df['Response'] = training_df['Response'].astype(int)
-    testing_df['Response'] = testing_df['Response'].astype(int)
-    
-    # Identify feature columns (exclude response and timestamp columns)
-    exclude_cols = ['Response', 'timestamp', 'synthetic_timestamp']
-    potential_features = [col for col in training_df.columns if col not in exclude_cols]
-    
-    # Filter to numeric columns only
-    numeric_features = []
-    for col in potential_features:
-        try:
-            training_df[col] = pd.to_numeric(training_df[col], errors='coerce')
-            testing_df[col] = pd.to_numeric(testing_df[col], errors='coerce')
-            if not training_df[col].isna().all():  # Column has some numeric values
-                numeric_features.append(col)
-        except:
-            logger.warning(f"Skipping non-numeric column: {col}")
-    
+    numeric_features = schema.feature_columns
     if not numeric_features:
         logger.error("No numeric feature columns found")
         raise ValueError("At least one numeric feature column is required")
     
     logger.info(f"Using feature columns: {numeric_features}")
     
-    # Handle missing values
-    for col in numeric_features:
-        training_df[col] = training_df[col].fillna(training_df[col].median())
-        testing_df[col] = testing_df[col].fillna(testing_df[col].median())
-    
-    return training_df, testing_df, numeric_features
-
-def generate_synthetic_data():
-    """Generate synthetic training and testing data for demonstration"""
-    np.random.seed(42)
+    # Coerce the test feature columns in one pass into float32 storage, like training
+    with track_stage("schema", timings):
+        X_test = coerce_numeric_matrix(testing_df.reindex(columns=numeric_features), numeric_features)
     
-    # Generate 1000 samples
-    n_samples = 1000
+    # Handle missing values with the training medians, so test data is imputed the same way
+    train_medians = np.zeros(len(numeric_features), dtype=np.float32)
+    observed = ~np.isnan(X_train).all(axis=0) if len(X_train) else np.zeros(len(numeric_features), dtype=bool)
+    train_medians[observed] = np.nanmedian(X_train[:, observed], axis=0)
+    X_train = np.where(np.isnan(X_train), train_medians, X_train)
+    X_test = np.where(np.isnan(X_test), train_medians, X_test)
     
-    # Generate synthetic sensor data
-    temperature = np.random.normal(25, 5, n_samples)
-    pressure = np.random.normal(1013, 10, n_samples)
-    humidity = np.random.normal(50, 15, n_samples)
-    
-    # Create synthetic quality labels based on sensor values
-    # Higher temperature, pressure, and humidity variations indicate potential quality issues
-    temp_score = np.abs(temperature - 25) / 5
-    pressure_score = np.abs(pressure - 1013) / 10
-    humidity_score = np.abs(humidity - 50) / 15
+    # Convert Response to binary if needed
+    processed_training = pd.DataFrame(X_train, columns=numeric_features, copy=False)
+    processed_training['Response'] = training_df['Response'].astype(int).to_numpy()
+    processed_testing = pd.DataFrame(X_test, columns=numeric_features, copy=False)
+    processed_testing['Response'] = testing_df['Response'].astype(int).to_numpy()
     
-    # Combined quality score
-    quality_score = temp_score + pressure_score + humidity_score
+    return processed_training, processed_testing, numeric_features
+
+@app.post("/synthetic-data")
+async def create_synthetic_data(request: SyntheticDataRequest):
+    """Stream a synthetic dataset as CSV, or write it to a CSV/Parquet file in DATA_DIR for /train-chunked"""
+    try:
+        validate_synthetic_parameters(request.rows, request.features, request.drift, request.failureRate)
+        if request.chunkSize < 1:
+            raise HTTPException(status_code=400, detail="chunkSize must be positive")
+        if request.format not in ("csv", "parquet"):
+            raise HTTPException(status_code=400, detail=f"Unsupported format: {request.format}. Use csv or parquet")
+        
+        parameters = {
+            "rows": request.rows,
+            "features": request.features,
+            "drift": request.drift,
+            "failureRate": request.failureRate,
+            "seed": request.seed,
+            "chunkSize": request.chunkSize
+        }
+        
+        if request.outputPath is None:
+            if request.format != "csv":
+                raise HTTPException(status_code=400, detail="Only csv can be streamed; set outputPath to write parquet")
+            return StreamingResponse(iter_synthetic_csv(parameters), media_type="text/csv")
+        
+        path = resolve_output_path(request.outputPath, request.format)
+        reused = await run_in_threadpool(write_synthetic_data, path, request.format, parameters)
+        
+        return {
+            "outputPath": request.outputPath,
+            "rows": request.rows,
+            "bytes": os.path.getsize(path),
+            "reused": reused
+        }
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error generating synthetic data: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Synthetic data generation failed: {str(e)}")
+
+def validate_synthetic_parameters(n_samples, n_features, drift, failure_rate):
+    if n_samples < 1:
+        raise ValueError("rows must be positive")
+    if n_features < len(SENSOR_COLUMNS):
+        raise ValueError(f"features must be at least {len(SENSOR_COLUMNS)}: {', '.join(SENSOR_COLUMNS)} always drive the response")
+    if not np.isfinite(drift):
+        raise ValueError("drift must be a finite number")
+    if failure_rate is not None and not 0 < failure_rate < 1:
+        raise ValueError("failureRate must be between 0 and 1")
+
+def generate_synthetic_data(n_samples=1000, n_features=3, drift=0.0, failure_rate=None, seed=42):
+    """Generate synthetic training and testing data for demonstration.
     
-    # Generate binary response (1 = Pass, 0 = Fail)
-    # Higher quality score means higher chance of failure
-    response = (quality_score < 1.5).astype(int)
+    Results are memoized per parameter set, so repeated fallbacks to synthetic data
+    reuse the same frames; callers must not modify them.
+    """
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    key = (n_samples, n_features, drift, failure_rate, seed)
+    with synthetic_cache_lock:
+        cached = synthetic_data_cache.get(key)
+        if cached is not None:
+            synthetic_data_cache.move_to_end(key)
+            return cached[:3]
     
-    # Create DataFrame
-    data = pd.DataFrame({
-        'Temperature': temperature,
-        'Pressure': pressure,
-        'Humidity': humidity,
-        'Response': response
-    })
+    data = pd.concat(iter_synthetic_chunks(n_samples, n_features, drift, failure_rate, seed), ignore_index=True)
     
     # Split into training and testing
-    train_data, test_data = train_test_split(data, test_size=0.3, random_state=42, stratify=data['Response'])
+    train_data, test_data = train_test_split(data, test_size=0.3, random_state=seed, stratify=data['Response'])
     
     # Define feature columns
-    feature_cols = ['Temperature', 'Pressure', 'Humidity']
+    feature_cols = [col for col in data.columns if col != 'Response']
+    
+    nbytes = int(train_data.memory_usage(index=True).sum() + test_data.memory_usage(index=True).sum())
+    if nbytes <= SYNTHETIC_CACHE_MAX_BYTES:
+        with synthetic_cache_lock:
+            synthetic_data_cache[key] = (train_data, test_data, feature_cols, nbytes)
+            while sum(cached[3] for cached in synthetic_data_cache.values()) > SYNTHETIC_CACHE_MAX_BYTES:
+                synthetic_data_cache.popitem(last=False)
     
     return train_data, test_data, feature_cols
 
+def iter_synthetic_chunks(n_samples, n_features=3, drift=0.0, failure_rate=None, seed=42, chunk_size=1000000, timestamps=False):
+    """Yield a synthetic dataset as DataFrames of at most chunk_size rows.
+    
+    The first three features are Temperature/Pressure/Humidity and drive the
+    response; any further features (Sensor_4, Sensor_5, ...) are noise, the way
+    most columns of a wide production line export are. With drift, the driving
+    sensors' means move linearly until they are drift standard deviations off at
+    the last row, which raises the failure rate over time. Every chunk draws from
+    its own generator seeded by (seed, chunk index), so the output does not depend
+    on anything but the parameters.
+    """
+    import pandas as pd
+    validate_synthetic_parameters(n_samples, n_features, drift, failure_rate)
+    threshold = synthetic_failure_threshold(failure_rate)
+    
+    for chunk_index, start in enumerate(range(0, n_samples, chunk_size)):
+        rows = min(chunk_size, n_samples - start)
+        rng = np.random.default_rng([seed, chunk_index])
+        
+        # Standardized sensor readings, shifted by the drift reached at each row
+        z = rng.standard_normal((3, rows), dtype=np.float32)
+        if drift:
+            z += ((start + np.arange(rows, dtype=np.float32)) * np.float32(drift / max(n_samples - 1, 1)))
+        
+        # Readings far from nominal on any sensor make a failure likely
+        quality_score = np.abs(z).sum(axis=0)
+        
+        columns = {}
+        if timestamps:
+            columns['synthetic_timestamp'] = pd.Timestamp(SYNTHETIC_START_TIME) + pd.to_timedelta(np.arange(start, start + rows), unit="s")
+        columns['Temperature'] = 25 + 5 * z[0]
+        columns['Pressure'] = 1013 + 10 * z[1]
+        columns['Humidity'] = 50 + 15 * z[2]
+        for i in range(4, n_features + 1):
+            columns[f'Sensor_{i}'] = rng.standard_normal(rows, dtype=np.float32)
+        
+        # Binary response (1 = Pass, 0 = Fail)
+        columns['Response'] = (quality_score < threshold).astype(int)
+        yield pd.DataFrame(columns)
+
+@lru_cache(maxsize=32)
+def synthetic_failure_threshold(failure_rate=None):
+    """Quality score below which a row passes, so that failure_rate of undrifted rows fail"""
+    if failure_rate is None:
+        return 1.5
+    # The score is a sum of three half-normals; estimate its quantile from a fixed sample
+    sample = np.abs(np.random.default_rng(0).standard_normal((3, 1000000))).sum(axis=0)
+    return float(np.quantile(sample, 1 - failure_rate))
+
+def iter_synthetic_csv(parameters):
+    """Stream a synthetic dataset as CSV text, one chunk at a time"""
+    chunks = iter_synthetic_chunks(parameters["rows"], parameters["features"], parameters["drift"],
+                                   parameters["failureRate"], parameters["seed"], parameters["chunkSize"], timestamps=True)
+    for chunk_index, chunk in enumerate(chunks):
+        yield chunk.to_csv(header=chunk_index == 0, index=False)
+
+def resolve_output_path(data_path, fmt):
+    """Resolve a file path to write inside DATA_DIR, rejecting anything outside it"""
+    data_dir = os.path.realpath(DATA_DIR)
+    path = os.path.realpath(os.path.join(data_dir, data_path))
+    if os.path.commonpath([data_dir, path]) != data_dir:
+        raise ValueError("outputPath must be inside the data directory")
+    if not path.lower().endswith(f".{fmt}"):
+        raise ValueError(f"outputPath must be a .{fmt} file")
+    return path
+
+def write_synthetic_data(path, fmt, parameters):
+    """Write a synthetic dataset to a file chunk by chunk; returns True if an identical file was already there"""
+    params_path = path + ".params.json"
+    try:
+        with open(params_path) as f:
+            if os.path.isfile(path) and json.load(f) == parameters:
+                logger.info(f"Reusing synthetic data file {path}")
+                return True
+    except (OSError, ValueError):
+        pass
+    
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    chunks = iter_synthetic_chunks(parameters["rows"], parameters["features"], parameters["drift"],
+                                   parameters["failureRate"], parameters["seed"], parameters["chunkSize"], timestamps=True)
+    tmp_path = path + ".tmp"
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("pyarrow is required to write Parquet files")
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = writer or pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        with open(tmp_path, "w", newline="") as f:
+            for chunk_index, chunk in enumerate(chunks):
+                chunk.to_csv(f, header=chunk_index == 0, index=False)
+    
+    os.replace(tmp_path, path)
+    with open(params_path, "w") as f:
+        json.dump(parameters, f)
+    
+    logger.info(f"Wrote {parameters['rows']} synthetic rows to {path}")
+    return False
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,145 @@
+"""Startup benchmark for the IntelliInspect ML service.
+
+Measures how long a fresh worker process takes to import the service, load the
+persisted model store, open a simulation session from records shaped like the
+backend's (every value a string) and serve its first prediction from it, and how
+much memory it holds by then, for each SERVICE_ROLE:
+
+    python startup_benchmark.py --runs 5 --output startup-results.json
+
+A model is trained once into a temporary model store first. Every run starts a
+new interpreter, so Python imports are cold while the OS page cache stays warm
+after the first run, as it would for the second worker on a node.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Runs in a fresh interpreter per measurement and prints one JSON line
+WORKER_SCRIPT = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+asyncio.run(main.load_model_store())
+loaded = time.perf_counter()
+
+rows = int(sys.argv[1])
+columns = main.get_model_entry().feature_columns
+records = [
+    dict({column: str(20.0 + (i % 17) * 0.5) for column in columns}, Response=str(i % 2),
+         synthetic_timestamp=f"2025-01-01 {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}")
+    for i in range(rows)
+]
+period = {"start": "2025-01-01T00:00:00", "end": "2025-12-31T23:59:59"}
+generated = time.perf_counter()
+session = asyncio.run(main.create_simulation_session(main.SimulationRequest(simulationPeriod=period, simulationData=records)))
+opened = time.perf_counter()
+asyncio.run(main.predict_session_next(session.sessionId))
+predicted = time.perf_counter()
+print(json.dumps({
+    "importSeconds": imported - start,
+    "loadSeconds": loaded - imported,
+    "sessionSeconds": opened - generated,
+    "firstPredictionSeconds": predicted - opened,
+    "readySeconds": predicted - start - (generated - loaded),
+    "rssMb": main.current_rss_bytes() / (1024 * 1024),
+    "models": len(main.model_registry),
+    "heavyModules": [name for name in ("pandas", "sklearn", "joblib") if name in sys.modules]
+}))
+"""
+
+TIMINGS = ("importSeconds", "loadSeconds", "sessionSeconds", "firstPredictionSeconds", "readySeconds", "processSeconds", "rssMb")
+
+def build_model_store(rows, features, inference_engine):
+    """Train and activate one model in the model store the workers will load"""
+    # Imported here so MODEL_STORE_DIR is already set when main is first imported
+    from fastapi.testclient import TestClient
+    from benchmark import DATE_RANGE, train_and_wait
+    import main
+
+    train_df, test_df, _ = main.generate_synthetic_data(n_samples=rows, n_features=features)
+    with TestClient(main.app) as client:
+        train_and_wait(client, {
+            "trainingPeriod": DATE_RANGE,
+            "testingPeriod": DATE_RANGE,
+            "trainingData": train_df.to_dict("records"),
+            "testingData": test_df.to_dict("records"),
+            "dataStrategy": "real_only",
+            "inferenceEngine": inference_engine
+        })
+
+def start_worker(role, simulation_rows):
+    """Start one worker process in the given role and return its measurements"""
+    env = {**os.environ, "SERVICE_ROLE": role, "LOG_LEVEL": "WARNING"}
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-c", WORKER_SCRIPT, str(simulation_rows)], env=env, capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    elapsed = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"{role} worker failed: {completed.stderr.strip()[-500:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["processSeconds"] = elapsed  # Includes interpreter startup, shutdown and generating the records
+    return result
+
+def benchmark_role(role, runs, simulation_rows):
+    """Median startup figures of a role over several fresh worker processes"""
+    samples = [start_worker(role, simulation_rows) for _ in range(runs)]
+    summary = {"role": role, "runs": runs}
+    for name in TIMINGS:
+        summary[name] = float(np.median([sample[name] for sample in samples]))
+    summary["models"] = samples[-1]["models"]
+    summary["heavyModules"] = samples[-1]["heavyModules"]
+    return summary
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark cold start of the IntelliInspect ML service")
+    parser.add_argument("--roles", default="all,predict", help="Comma-separated SERVICE_ROLE values to measure")
+    parser.add_argument("--runs", type=int, default=5, help="Worker processes started per role")
+    parser.add_argument("--rows", type=int, default=10000, help="Rows of synthetic data the stored model is trained on")
+    parser.add_argument("--features", type=int, default=3, help="Number of feature columns")
+    parser.add_argument("--simulation-rows", type=int, default=1000, help="Records in the simulation session each worker opens")
+    parser.add_argument("--inference-engine", default="sklearn", choices=("sklearn", "compiled"),
+                        help="Inference engine the stored model is saved with")
+    parser.add_argument("--output", default="startup-results.json", help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    # Keep benchmark models out of the real model store, and request and job logging out of the output
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["MODEL_STORE_DIR"] = tempfile.mkdtemp(prefix="intelliinspect-startup-")
+    print(f"Training a model on {args.rows} rows into {os.environ['MODEL_STORE_DIR']}...")
+    build_model_store(args.rows, args.features, args.inference_engine)
+
+    results = []
+    for role in [r.strip() for r in args.roles.split(",") if r.strip()]:
+        result = benchmark_role(role, args.runs, args.simulation_rows)
+        results.append(result)
+        print(f"  {role:<8} import {result['importSeconds'] * 1000:8.1f} ms  load {result['loadSeconds'] * 1000:8.1f} ms  "
+              f"session {result['sessionSeconds'] * 1000:8.1f} ms  first prediction {result['firstPredictionSeconds'] * 1000:8.1f} ms  ready {result['readySeconds'] * 1000:8.1f} ms  "
+              f"process {result['processSeconds'] * 1000:8.1f} ms  RSS {result['rssMb']:7.1f} MB  "
+              f"loaded: {', '.join(result['heavyModules']) or 'none'}")
+
+    report = {
+        "createdAt": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "rows": args.rows,
+        "features": args.features,
+        "simulationRows": args.simulation_rows,
+        "inferenceEngine": args.inference_engine,
+        "results": results
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main_cli()